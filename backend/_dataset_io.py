@@ -0,0 +1,111 @@
+"""
+Dataset loading helpers shared by the ChromaDB conversion scripts
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+
+def _write_parquet(df, parquet_path, **kwargs):
+    """Write a Parquet file via a temp file in the same directory, so an interrupted
+    run never leaves a truncated file that later runs would take as up to date"""
+    fd, tmp_path = tempfile.mkstemp(dir=parquet_path.parent, prefix=f".{parquet_path.name}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, **kwargs)
+
+        # mkstemp creates the file owner-only; give it the mode a plain open() would
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+
+        os.replace(tmp_path, parquet_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def parquet_copy(csv_path):
+    """Path of the Parquet copy of a CSV, converting it once (or again when the CSV is newer)"""
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+
+    if not parquet_path.exists() or parquet_path.stat().st_mtime < csv_path.stat().st_mtime:
+        print(f"[INFO] Converting {csv_path.name} to Parquet (one-time)...")
+        _write_parquet(pd.read_csv(csv_path, engine='pyarrow'), parquet_path, compression='zstd')
+
+    return parquet_path
+
+
+def read_columns(csv_path, columns):
+    """Read only the given columns of a dataset from its Parquet copy.
+
+    Columns missing from the file are skipped rather than raising, so the
+    callers can keep treating optional fields as absent.
+    """
+    parquet_path = parquet_copy(csv_path)
+    available = set(pq.read_schema(parquet_path).names)
+    return pd.read_parquet(parquet_path, columns=[c for c in columns if c in available])
+
+
+def read_latest_rows(csv_path, columns, sort_column, n_rows):
+    """Read the n_rows most recent rows of a dataset, ordered by sort_column.
+
+    Uses a Parquet copy sorted by sort_column and written in row groups of
+    n_rows, so only the trailing row groups are read from disk instead of
+    the whole file.
+    """
+    csv_path = Path(csv_path)
+    parquet_path = csv_path.with_name(f"{csv_path.stem}_by_{sort_column}.parquet")
+
+    if not parquet_path.exists() or parquet_path.stat().st_mtime < csv_path.stat().st_mtime:
+        print(f"[INFO] Writing {parquet_path.name} sorted by {sort_column} (one-time)...")
+        df = pd.read_csv(csv_path, engine='pyarrow')
+        df = df.sort_values(sort_column, key=lambda s: pd.to_datetime(s, errors='coerce'),
+                            kind='stable', na_position='first')
+        _write_parquet(df, parquet_path, compression='zstd', row_group_size=n_rows)
+
+    parquet_file = pq.ParquetFile(parquet_path)
+    row_groups = []
+    rows = 0
+    for i in reversed(range(parquet_file.num_row_groups)):
+        row_groups.insert(0, i)
+        rows += parquet_file.metadata.row_group(i).num_rows
+        if rows >= n_rows:
+            break
+
+    available = set(parquet_file.schema_arrow.names)
+    table = parquet_file.read_row_groups(row_groups, columns=[c for c in columns if c in available],
+                                         use_pandas_metadata=True)
+    return table.to_pandas().tail(n_rows)
+
+
+def numeric_values(df, column):
+    """Float array of a column and its not-missing mask.
+
+    Computed once per dataset so row loops index plain arrays instead of
+    calling pd.notna on every value. A missing column is all-missing.
+    """
+    if column in df:
+        values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+    else:
+        values = np.full(len(df), np.nan)
+    return values, ~np.isnan(values)
+
+
+def text_column(df, column, default=''):
+    """Column as stripped strings, with missing values (or a missing column) replaced by default"""
+    if column not in df:
+        return pd.Series(default, index=df.index)
+    return df[column].fillna(default).astype(str).str.strip()
+
+
+def has_text(df, column):
+    """Mask of rows where column holds a non-blank value (all False for a missing column)"""
+    if column not in df:
+        return pd.Series(False, index=df.index)
+    return df[column].notna() & (df[column].astype(str).str.strip().str.len() > 0)
@@ -0,0 +1,66 @@
+"""
+Shared SentenceTransformer encoder for the ChromaDB conversion scripts
+Loaded once per process instead of at every script import
+"""
+import os
+
+import chromadb
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Chroma accepts numpy embeddings from 0.5 on; the pinned 0.4.x clients require nested lists
+CHROMA_ACCEPTS_NUMPY = tuple(int(part) for part in chromadb.__version__.split('.')[:2]) >= (0, 5)
+
+_model = None
+
+
+def get_model() -> SentenceTransformer:
+    """Get the process-wide MiniLM encoder, loading it on first use"""
+    global _model
+
+    if _model is None:
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        print(f"[INFO] Loading Sentence Transformer model on {device}...")
+        _model = SentenceTransformer(MODEL_NAME, device=device)
+
+        if device == 'cuda':
+            # fp16 halves memory bandwidth on the transformer forward pass
+            _model.half()
+        else:
+            torch.set_num_threads(os.cpu_count())
+
+        _model.eval()
+
+    return _model
+
+
+def embed(documents, **kwargs):
+    """Encode documents as unit-length float32 vectors in a numpy array, without autograd bookkeeping"""
+    model = get_model()
+    batch_size = 512 if model.device.type == 'cuda' else 128
+
+    # L2 normalization runs on the device inside encode(), per mini-batch, so the stored
+    # vectors stay unit-length even when the forward pass runs in fp16
+    with torch.inference_mode():
+        embeddings = model.encode(documents, batch_size=batch_size, convert_to_numpy=True,
+                                  normalize_embeddings=True, **kwargs)
+
+    # The fp16 CUDA model returns float16; callers cache and store float32 either way
+    # (a no-op on CPU, where the model already runs in float32)
+    return embeddings.astype(np.float32, copy=False)
+
+
+def chroma_embeddings(embeddings):
+    """Embeddings in the form collection.add() takes: a float32 array where Chroma
+    accepts it, avoiding one Python float object per value, otherwise nested lists.
+
+    Any other float dtype (e.g. from a static model) is converted, so Chroma
+    receives float32 values whichever encoder produced them.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if CHROMA_ACCEPTS_NUMPY:
+        return embeddings
+    return embeddings.tolist()
@@ -1,8 +1,10 @@
 """Cloud configuration for ChromaDB"""
 import os
+from functools import lru_cache
 
+@lru_cache(maxsize=1)
 def get_chromadb_config():
-    """Get ChromaDB configuration"""
+    """Get ChromaDB configuration (environment is read once per process)"""
     
     if os.getenv('ENVIRONMENT') == 'production':
         # Cloud Run ChromaDB service
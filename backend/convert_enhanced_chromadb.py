@@ -8,413 +8,469 @@ Converts 5 datasets into separate ChromaDB collections for the PropBot:
 5. Boston Crime - Safety data
 """
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 from chromadb import PersistentClient
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 import os
 
-print("[INFO] Loading Sentence Transformer model...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from _dataset_io import has_text, numeric_values, read_columns, read_latest_rows, text_column
+from _embedder import chroma_embeddings, embed, get_model
 
-# Create new ChromaDB
-chroma_path = "chroma_data_new"
-if os.path.exists(chroma_path):
-    print(f"[WARNING] Removing existing {chroma_path}")
-    import shutil
-    shutil.rmtree(chroma_path)
+CHROMA_PATH = "chroma_data_new"
+# Fallback add() chunk size for Chroma versions that don't report their own limit
+ADD_BATCH_SIZE = 5000
 
-client = PersistentClient(
-    path=chroma_path,
-    settings=Settings(anonymized_telemetry=False)
-)
+# Only the columns each dataset actually uses are parsed
+PROPERTY_COLUMNS = ['pid', 'st_num', 'st_name', 'city', 'zip_code', 'bed_rms', 'full_bth', 'hlf_bth',
+                    'living_area', 'yr_built', 'total_value', 'land_value', 'bldg_value', '_gross_tax_',
+                    'bldg_type', 'lu_desc', 'overall_cond']
+MBTA_COLUMNS = ['station_name', 'municipality', 'latitude', 'longitude', 'station_id']
+SCHOOL_COLUMNS = ['sch_name', 'address', 'city', 'zipcode', 'sch_type', 'point_y', 'point_x', 'sch_id']
+YELP_COLUMNS = ['name', 'category', 'rating', 'review_count', 'price', 'address', 'city',
+                'latitude', 'longitude', 'business_id']
+CRIME_SAMPLE_SIZE = 50000
+CRIME_COLUMNS = ['offense_description', 'offense_code_group', 'district', 'street', 'occurred_on_date',
+                 'year', 'lat', 'long', 'incident_number']
 
-batch_size = 100
 
-# ============================================================================
-# DATASET 1: PROPERTIES MASTER
-# ============================================================================
-print("\n" + "="*80)
-print("[1/5] PROCESSING PROPERTIES MASTER")
-print("="*80)
-
-df_props = pd.read_csv('other_data/properties_master_cleaned.csv')
-print(f"[INFO] Loaded {len(df_props)} properties")
-
-collection_props = client.create_collection(name="properties_collection")
-
-documents = []
-metadatas = []
-ids = []
-
-for idx, row in tqdm(df_props.iterrows(), total=len(df_props), desc="Processing Properties"):
-    try:
-        # Extract key fields
-        address = f"{row.get('st_num', '')} {row.get('st_name', '')}".strip()
-        city = str(row.get('city', 'Boston')).strip()
-        zipcode = str(row.get('zip_code', '')).strip()
-
-        # Property details
-        bedrooms = row.get('bed_rms', None)
-        bathrooms = float(row.get('full_bth', 0)) + float(row.get('hlf_bth', 0)) * 0.5 if pd.notna(row.get('full_bth')) else None
-        sqft = row.get('living_area', None)
-        year_built = row.get('yr_built', None)
-
-        # Financial
-        total_value = row.get('total_value', None)
-        land_value = row.get('land_value', None)
-        bldg_value = row.get('bldg_value', None)
-        gross_tax = row.get('_gross_tax_', None)
-
-        # Building info
-        bldg_type = str(row.get('bldg_type', '')).strip()
-        lu_desc = str(row.get('lu_desc', '')).strip()
-        overall_cond = str(row.get('overall_cond', '')).strip()
-
-        # Create rich text description
-        doc_text = f"property | {lu_desc} | {address}, {city} {zipcode}"
-        if total_value:
-            doc_text += f" | Value: ${total_value:,.0f}" if isinstance(total_value, (int, float)) else f" | Value: {total_value}"
-        if bedrooms:
-            doc_text += f" | {int(bedrooms)} bed"
-        if bathrooms:
-            doc_text += f", {bathrooms} bath"
-        if sqft:
-            doc_text += f" | {int(sqft)} sqft"
-        if year_built:
-            doc_text += f" | Built: {int(year_built)}"
-        if bldg_type:
-            doc_text += f" | {bldg_type}"
-        if overall_cond:
-            doc_text += f" | Condition: {overall_cond}"
-
-        # Metadata
-        metadata = {
-            'type': 'property',
-            'address': address,
-            'city': city,
-            'zipcode': zipcode,
-            'bedrooms': int(bedrooms) if pd.notna(bedrooms) else None,
-            'bathrooms': float(bathrooms) if pd.notna(bathrooms) else None,
-            'sqft': int(sqft) if pd.notna(sqft) else None,
-            'year_built': int(year_built) if pd.notna(year_built) else None,
-            'total_value': float(total_value) if pd.notna(total_value) and isinstance(total_value, (int, float)) else None,
-            'land_value': float(land_value) if pd.notna(land_value) and isinstance(land_value, (int, float)) else None,
-            'bldg_value': float(bldg_value) if pd.notna(bldg_value) and isinstance(bldg_value, (int, float)) else None,
-            'property_tax': str(gross_tax) if pd.notna(gross_tax) else None,
-            'building_type': bldg_type,
-            'land_use': lu_desc,
-            'condition': overall_cond,
-            'pid': str(row.get('pid', ''))
-        }
+def numeric_column(df, column):
+    """Column coerced to float, with non-numeric values (or a missing column) as NaN"""
+    if column not in df:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce')
 
-        documents.append(doc_text)
-        metadatas.append(metadata)
-        ids.append(f"prop_{idx}")
 
-        # Batch insert
-        if len(documents) >= batch_size:
-            embeddings = model.encode(documents).tolist()
-            collection_props.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
-            documents, metadatas, ids = [], [], []
+def text_piece(mask, text):
+    """Keep text where mask is set and use '' elsewhere, so pieces can be concatenated"""
+    return text.where(mask, '')
 
-    except Exception as e:
-        print(f"[WARNING] Error processing property {idx}: {e}")
-        continue
 
-# Final batch
-if documents:
-    embeddings = model.encode(documents).tolist()
-    collection_props.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
+# ============================================================================
+# DATASET 1: PROPERTIES MASTER
+# ============================================================================
+def prepare_properties():
+    """Build the documents, metadatas and ids for the properties_collection"""
+    df_props = read_columns('other_data/properties_master_cleaned.csv', PROPERTY_COLUMNS)
+    print(f"[INFO] Loaded {len(df_props)} properties")
+
+    # Rows without a street or land use can't be described; drop them up front
+    df_props = df_props[has_text(df_props, 'st_name') & has_text(df_props, 'lu_desc')]
+
+    # Clean the shared fields once for the whole frame
+    props_address = (text_column(df_props, 'st_num') + ' ' + text_column(df_props, 'st_name')).str.strip()
+    props_city = text_column(df_props, 'city', 'Boston')
+    props_zip = text_column(df_props, 'zip_code')
+    props_value = numeric_column(df_props, 'total_value')
+    props_beds = numeric_column(df_props, 'bed_rms')
+    props_baths = numeric_column(df_props, 'full_bth') + numeric_column(df_props, 'hlf_bth').fillna(0) * 0.5
+    props_sqft = numeric_column(df_props, 'living_area')
+    props_year = numeric_column(df_props, 'yr_built')
+    props_bldg_type = text_column(df_props, 'bldg_type')
+    props_land_use = text_column(df_props, 'lu_desc')
+    props_cond = text_column(df_props, 'overall_cond')
+
+    # Build the rich text description for every property in one vectorized pass
+    props_docs = (
+        'property | ' + props_land_use
+        + ' | ' + props_address
+        + ', ' + props_city + ' ' + props_zip
+        + text_piece(props_value > 0, ' | Value: $' + props_value.map('{:,.0f}'.format))
+        + text_piece(props_beds > 0, ' | ' + props_beds.fillna(0).astype('int64').astype(str) + ' bed')
+        + text_piece(props_baths > 0, ', ' + props_baths.astype(str) + ' bath')
+        + text_piece(props_sqft > 0, ' | ' + props_sqft.fillna(0).astype('int64').astype(str) + ' sqft')
+        + text_piece(props_year > 0, ' | Built: ' + props_year.fillna(0).astype('int64').astype(str))
+        + text_piece(props_bldg_type != '', ' | ' + props_bldg_type)
+        + text_piece(props_cond != '', ' | Condition: ' + props_cond)
+    )
+
+    # Metadata for every property, converted to dicts in one call
+    props_tax = df_props['_gross_tax_'] if '_gross_tax_' in df_props else pd.Series(np.nan, index=df_props.index)
+    props_meta = pd.DataFrame({
+        'type': 'property',
+        'address': props_address,
+        'city': props_city,
+        'zipcode': props_zip,
+        'bedrooms': np.trunc(props_beds).astype('Int64'),
+        'bathrooms': props_baths,
+        'sqft': np.trunc(props_sqft).astype('Int64'),
+        'year_built': np.trunc(props_year).astype('Int64'),
+        'total_value': props_value,
+        'land_value': numeric_column(df_props, 'land_value'),
+        'bldg_value': numeric_column(df_props, 'bldg_value'),
+        'property_tax': props_tax.astype(str).where(props_tax.notna()),
+        'building_type': props_bldg_type,
+        'land_use': props_land_use,
+        'condition': props_cond,
+        'pid': text_column(df_props, 'pid')
+    })
+    props_meta = props_meta.astype(object).where(props_meta.notna(), None)
+
+    documents = props_docs.tolist()
+    metadatas = props_meta.to_dict('records')
+    ids = [f"prop_{idx}" for idx in df_props.index]
+
+    return 'properties_collection', documents, metadatas, ids
 
-print(f"[SUCCESS] Properties collection: {collection_props.count()} entries")
 
 # ============================================================================
 # DATASET 2: MBTA STATIONS
 # ============================================================================
-print("\n" + "="*80)
-print("[2/5] PROCESSING MBTA STATIONS")
-print("="*80)
+def prepare_transit():
+    """Build the documents, metadatas and ids for the transit_collection"""
+    df_mbta = read_columns('other_data/mbta_stations_cleaned.csv', MBTA_COLUMNS)
+    print(f"[INFO] Loaded {len(df_mbta)} MBTA stations")
 
-df_mbta = pd.read_csv('other_data/mbta_stations_cleaned.csv')
-print(f"[INFO] Loaded {len(df_mbta)} MBTA stations")
+    df_mbta = df_mbta[has_text(df_mbta, 'station_name')]
 
-collection_transit = client.create_collection(name="transit_collection")
+    station_names = text_column(df_mbta, 'station_name').tolist()
+    municipalities = text_column(df_mbta, 'municipality', 'Boston').tolist()
+    station_ids = text_column(df_mbta, 'station_id').tolist()
+    lats, lat_mask = numeric_values(df_mbta, 'latitude')
+    lons, lon_mask = numeric_values(df_mbta, 'longitude')
 
-documents = []
-metadatas = []
-ids = []
+    documents = []
+    metadatas = []
+    ids = []
 
-for idx, row in tqdm(df_mbta.iterrows(), total=len(df_mbta), desc="Processing MBTA"):
-    try:
-        station_name = str(row.get('station_name', '')).strip()
-        municipality = str(row.get('municipality', 'Boston')).strip()
-        lat = row.get('latitude', None)
-        lon = row.get('longitude', None)
-        station_id = row.get('station_id', '')
+    for i, idx in enumerate(tqdm(df_mbta.index, total=len(df_mbta), desc="Processing MBTA")):
+        station_name = station_names[i]
+        municipality = municipalities[i]
 
         # Rich text
         doc_text = f"MBTA Station | {station_name} | {municipality}"
-        if lat and lon:
-            doc_text += f" | Location: ({lat:.4f}, {lon:.4f})"
+        if lat_mask[i] and lon_mask[i] and lats[i] and lons[i]:
+            doc_text += f" | Location: ({lats[i]:.4f}, {lons[i]:.4f})"
 
         metadata = {
             'type': 'transit',
             'station_name': station_name,
             'municipality': municipality,
-            'latitude': float(lat) if pd.notna(lat) else None,
-            'longitude': float(lon) if pd.notna(lon) else None,
-            'station_id': str(station_id)
+            'latitude': float(lats[i]) if lat_mask[i] else None,
+            'longitude': float(lons[i]) if lon_mask[i] else None,
+            'station_id': station_ids[i]
         }
 
         documents.append(doc_text)
         metadatas.append(metadata)
         ids.append(f"mbta_{idx}")
 
-        if len(documents) >= batch_size:
-            embeddings = model.encode(documents).tolist()
-            collection_transit.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
-            documents, metadatas, ids = [], [], []
+    return 'transit_collection', documents, metadatas, ids
 
-    except Exception as e:
-        print(f"[WARNING] Error processing MBTA {idx}: {e}")
-        continue
-
-if documents:
-    embeddings = model.encode(documents).tolist()
-    collection_transit.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
-
-print(f"[SUCCESS] Transit collection: {collection_transit.count()} entries")
 
 # ============================================================================
 # DATASET 3: PUBLIC SCHOOLS
 # ============================================================================
-print("\n" + "="*80)
-print("[3/5] PROCESSING PUBLIC SCHOOLS")
-print("="*80)
-
-df_schools = pd.read_csv('other_data/public_schools_cleaned.csv')
-print(f"[INFO] Loaded {len(df_schools)} public schools")
-
-collection_schools = client.create_collection(name="schools_collection")
-
-documents = []
-metadatas = []
-ids = []
-
-for idx, row in tqdm(df_schools.iterrows(), total=len(df_schools), desc="Processing Schools"):
-    try:
-        school_name = str(row.get('sch_name', '')).strip()
-        address = str(row.get('address', '')).strip()
-        city = str(row.get('city', 'Boston')).strip()
-        zipcode = str(row.get('zipcode', '')).strip()
-        school_type = str(row.get('sch_type', '')).strip()
-        lat = row.get('point_y', None)
-        lon = row.get('point_x', None)
+def prepare_schools():
+    """Build the documents, metadatas and ids for the schools_collection"""
+    df_schools = read_columns('other_data/public_schools_cleaned.csv', SCHOOL_COLUMNS)
+    print(f"[INFO] Loaded {len(df_schools)} public schools")
+
+    df_schools = df_schools[has_text(df_schools, 'sch_name')]
+
+    school_names = text_column(df_schools, 'sch_name').tolist()
+    addresses = text_column(df_schools, 'address').tolist()
+    cities = text_column(df_schools, 'city', 'Boston').tolist()
+    zipcodes = text_column(df_schools, 'zipcode').tolist()
+    school_types = text_column(df_schools, 'sch_type').tolist()
+    school_ids = text_column(df_schools, 'sch_id').tolist()
+    lats, lat_mask = numeric_values(df_schools, 'point_y')
+    lons, lon_mask = numeric_values(df_schools, 'point_x')
+
+    documents = []
+    metadatas = []
+    ids = []
+
+    for i, idx in enumerate(tqdm(df_schools.index, total=len(df_schools), desc="Processing Schools")):
+        school_name = school_names[i]
+        school_type = school_types[i]
 
         # Rich text
         doc_text = f"Public School | {school_name}"
         if school_type:
             doc_text += f" | Type: {school_type}"
-        doc_text += f" | {address}, {city} {zipcode}"
+        doc_text += f" | {addresses[i]}, {cities[i]} {zipcodes[i]}"
 
         metadata = {
             'type': 'school',
             'school_name': school_name,
-            'address': address,
-            'city': city,
-            'zipcode': zipcode,
+            'address': addresses[i],
+            'city': cities[i],
+            'zipcode': zipcodes[i],
             'school_type': school_type,
-            'latitude': float(lat) if pd.notna(lat) else None,
-            'longitude': float(lon) if pd.notna(lon) else None,
-            'school_id': str(row.get('sch_id', ''))
+            'latitude': float(lats[i]) if lat_mask[i] else None,
+            'longitude': float(lons[i]) if lon_mask[i] else None,
+            'school_id': school_ids[i]
         }
 
         documents.append(doc_text)
         metadatas.append(metadata)
         ids.append(f"school_{idx}")
 
-        if len(documents) >= batch_size:
-            embeddings = model.encode(documents).tolist()
-            collection_schools.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
-            documents, metadatas, ids = [], [], []
-
-    except Exception as e:
-        print(f"[WARNING] Error processing school {idx}: {e}")
-        continue
+    return 'schools_collection', documents, metadatas, ids
 
-if documents:
-    embeddings = model.encode(documents).tolist()
-    collection_schools.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
-
-print(f"[SUCCESS] Schools collection: {collection_schools.count()} entries")
 
 # ============================================================================
 # DATASET 4: YELP BUSINESSES
 # ============================================================================
-print("\n" + "="*80)
-print("[4/5] PROCESSING YELP BUSINESSES")
-print("="*80)
-
-df_yelp = pd.read_csv('other_data/yelp_businesses_cleaned.csv')
-print(f"[INFO] Loaded {len(df_yelp)} Yelp businesses")
-
-collection_amenities = client.create_collection(name="amenities_collection")
-
-documents = []
-metadatas = []
-ids = []
-
-for idx, row in tqdm(df_yelp.iterrows(), total=len(df_yelp), desc="Processing Yelp"):
-    try:
-        name = str(row.get('name', '')).strip()
-        category = str(row.get('category', '')).strip()
-        rating = row.get('rating', None)
-        review_count = row.get('review_count', None)
-        price = str(row.get('price', '')).strip()
-        address = str(row.get('address', '')).strip()
-        city = str(row.get('city', 'Boston')).strip()
-        lat = row.get('latitude', None)
-        lon = row.get('longitude', None)
+def prepare_amenities():
+    """Build the documents, metadatas and ids for the amenities_collection"""
+    df_yelp = read_columns('other_data/yelp_businesses_cleaned.csv', YELP_COLUMNS)
+    print(f"[INFO] Loaded {len(df_yelp)} Yelp businesses")
+
+    df_yelp = df_yelp[has_text(df_yelp, 'name')]
+
+    names = text_column(df_yelp, 'name').tolist()
+    categories = text_column(df_yelp, 'category').tolist()
+    prices = text_column(df_yelp, 'price').tolist()
+    addresses = text_column(df_yelp, 'address').tolist()
+    cities = text_column(df_yelp, 'city', 'Boston').tolist()
+    business_ids = text_column(df_yelp, 'business_id').tolist()
+    ratings, rating_mask = numeric_values(df_yelp, 'rating')
+    review_counts, review_mask = numeric_values(df_yelp, 'review_count')
+    lats, lat_mask = numeric_values(df_yelp, 'latitude')
+    lons, lon_mask = numeric_values(df_yelp, 'longitude')
+
+    documents = []
+    metadatas = []
+    ids = []
+
+    for i, idx in enumerate(tqdm(df_yelp.index, total=len(df_yelp), desc="Processing Yelp")):
+        name = names[i]
+        category = categories[i]
+        price = prices[i]
 
         # Rich text
         doc_text = f"Business | {name} | Category: {category}"
-        if rating:
-            doc_text += f" | Rating: {rating}/5"
-        if review_count:
-            doc_text += f" ({review_count} reviews)"
+        if rating_mask[i] and ratings[i]:
+            doc_text += f" | Rating: {ratings[i]}/5"
+        if review_mask[i] and review_counts[i]:
+            doc_text += f" ({int(review_counts[i])} reviews)"
         if price:
             doc_text += f" | Price: {price}"
-        doc_text += f" | {address}, {city}"
+        doc_text += f" | {addresses[i]}, {cities[i]}"
 
         metadata = {
             'type': 'amenity',
             'business_name': name,
             'category': category,
-            'rating': float(rating) if pd.notna(rating) else None,
-            'review_count': int(review_count) if pd.notna(review_count) else None,
+            'rating': float(ratings[i]) if rating_mask[i] else None,
+            'review_count': int(review_counts[i]) if review_mask[i] else None,
             'price_range': price,
-            'address': address,
-            'city': city,
-            'latitude': float(lat) if pd.notna(lat) else None,
-            'longitude': float(lon) if pd.notna(lon) else None,
-            'business_id': str(row.get('business_id', ''))
+            'address': addresses[i],
+            'city': cities[i],
+            'latitude': float(lats[i]) if lat_mask[i] else None,
+            'longitude': float(lons[i]) if lon_mask[i] else None,
+            'business_id': business_ids[i]
         }
 
         documents.append(doc_text)
         metadatas.append(metadata)
         ids.append(f"yelp_{idx}")
 
-        if len(documents) >= batch_size:
-            embeddings = model.encode(documents).tolist()
-            collection_amenities.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
-            documents, metadatas, ids = [], [], []
-
-    except Exception as e:
-        print(f"[WARNING] Error processing Yelp {idx}: {e}")
-        continue
-
-if documents:
-    embeddings = model.encode(documents).tolist()
-    collection_amenities.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
+    return 'amenities_collection', documents, metadatas, ids
 
-print(f"[SUCCESS] Amenities collection: {collection_amenities.count()} entries")
 
 # ============================================================================
 # DATASET 5: BOSTON CRIME
 # ============================================================================
-print("\n" + "="*80)
-print("[5/5] PROCESSING BOSTON CRIME DATA")
-print("="*80)
-
-df_crime = pd.read_csv('other_data/boston_crime_cleaned.csv')
-print(f"[INFO] Loaded {len(df_crime)} crime incidents")
-
-# Sample crime data if too large (keep most recent)
-if len(df_crime) > 50000:
-    print(f"[INFO] Sampling 50,000 most recent incidents from {len(df_crime)}")
-    df_crime = df_crime.tail(50000)
-
-collection_crime = client.create_collection(name="crime_collection")
-
-documents = []
-metadatas = []
-ids = []
-
-for idx, row in tqdm(df_crime.iterrows(), total=len(df_crime), desc="Processing Crime"):
-    try:
-        offense = str(row.get('offense_description', '')).strip()
-        offense_group = str(row.get('offense_code_group', '')).strip()
-        district = str(row.get('district', '')).strip()
-        street = str(row.get('street', '')).strip()
-        date = str(row.get('occurred_on_date', '')).strip()
-        year = row.get('year', None)
-        lat = row.get('lat', None)
-        lon = row.get('long', None)
+def prepare_crime():
+    """Build the documents, metadatas and ids for the crime_collection"""
+    # Keep only the most recent incidents; read straight from the date-sorted Parquet copy
+    df_crime = read_latest_rows('other_data/boston_crime_cleaned.csv', CRIME_COLUMNS,
+                                'occurred_on_date', CRIME_SAMPLE_SIZE)
+    print(f"[INFO] Loaded {len(df_crime)} most recent crime incidents")
+
+    df_crime = df_crime[has_text(df_crime, 'offense_description')]
+
+    offenses = text_column(df_crime, 'offense_description').tolist()
+    offense_groups = text_column(df_crime, 'offense_code_group').tolist()
+    districts = text_column(df_crime, 'district').tolist()
+    streets = text_column(df_crime, 'street').tolist()
+    dates = text_column(df_crime, 'occurred_on_date').tolist()
+    incident_numbers = text_column(df_crime, 'incident_number').tolist()
+    years, year_mask = numeric_values(df_crime, 'year')
+    lats, lat_mask = numeric_values(df_crime, 'lat')
+    lons, lon_mask = numeric_values(df_crime, 'long')
+
+    documents = []
+    metadatas = []
+    ids = []
+
+    for i, idx in enumerate(tqdm(df_crime.index, total=len(df_crime), desc="Processing Crime")):
+        offense_group = offense_groups[i]
+        district = districts[i]
+        street = streets[i]
 
         # Rich text
-        doc_text = f"Crime Incident | {offense}"
+        doc_text = f"Crime Incident | {offenses[i]}"
         if offense_group:
             doc_text += f" | Category: {offense_group}"
         if district:
             doc_text += f" | District: {district}"
         if street:
             doc_text += f" | Location: {street}"
-        if year:
-            doc_text += f" | Year: {int(year)}"
+        if year_mask[i] and years[i]:
+            doc_text += f" | Year: {int(years[i])}"
 
         metadata = {
             'type': 'crime',
-            'offense': offense,
+            'offense': offenses[i],
             'offense_group': offense_group,
             'district': district,
             'street': street,
-            'date': date,
-            'year': int(year) if pd.notna(year) else None,
-            'latitude': float(lat) if pd.notna(lat) else None,
-            'longitude': float(lon) if pd.notna(lon) else None,
-            'incident_number': str(row.get('incident_number', ''))
+            'date': dates[i],
+            'year': int(years[i]) if year_mask[i] else None,
+            'latitude': float(lats[i]) if lat_mask[i] else None,
+            'longitude': float(lons[i]) if lon_mask[i] else None,
+            'incident_number': incident_numbers[i]
         }
 
         documents.append(doc_text)
         metadatas.append(metadata)
         ids.append(f"crime_{idx}")
 
-        if len(documents) >= batch_size:
-            embeddings = model.encode(documents).tolist()
-            collection_crime.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
-            documents, metadatas, ids = [], [], []
-
-    except Exception as e:
-        print(f"[WARNING] Error processing crime {idx}: {e}")
-        continue
-
-if documents:
-    embeddings = model.encode(documents).tolist()
-    collection_crime.add(documents=documents, metadatas=metadatas, embeddings=embeddings, ids=ids)
-
-print(f"[SUCCESS] Crime collection: {collection_crime.count()} entries")
-
-# ============================================================================
-# SUMMARY
-# ============================================================================
-print("\n" + "="*80)
-print("[COMPLETE] CHROMADB CREATION SUMMARY")
-print("="*80)
-print(f"Location: {chroma_path}")
-print(f"\nCollections created:")
-print(f"  1. properties_collection: {collection_props.count():,} entries")
-print(f"  2. transit_collection: {collection_transit.count():,} entries")
-print(f"  3. schools_collection: {collection_schools.count():,} entries")
-print(f"  4. amenities_collection: {collection_amenities.count():,} entries")
-print(f"  5. crime_collection: {collection_crime.count():,} entries")
-print(f"\nTotal entries: {collection_props.count() + collection_transit.count() + collection_schools.count() + collection_amenities.count() + collection_crime.count():,}")
-print("\n[NEXT STEPS]")
-print("1. Backup old chroma_data: mv chroma_data chroma_data_backup")
-print("2. Replace with new: mv chroma_data_new chroma_data")
-print("3. Update rag_pipeline.py to load all 5 collections")
-print("4. Test locally")
-print("5. Rebuild Docker container")
-print("6. Deploy to GCP")
+    return 'crime_collection', documents, metadatas, ids
+
+
+# (prepare function, encode with the optional static model)
+DATASETS = [
+    (prepare_properties, False),
+    (prepare_transit, True),
+    (prepare_schools, True),
+    (prepare_amenities, False),
+    (prepare_crime, True),
+]
+
+
+def load_static_model():
+    """Load the optional static embedding model for the short templated transit/school/crime rows.
+
+    Off by default: the RAG pipeline embeds queries with MiniLM, so the query side must use
+    the same model before these collections can be built with it.
+    """
+    static_model_name = os.getenv('STATIC_EMBEDDING_MODEL')
+    if not static_model_name:
+        return None
+
+    from model2vec import StaticModel
+    print(f"[INFO] Loading static embedding model {static_model_name}...")
+    return StaticModel.from_pretrained(static_model_name)
+
+
+def encode(documents, cache, static_model=None):
+    """Embed documents with the shared MiniLM encoder, or the static model when given.
+
+    Templated rows repeat a lot (same offense/district, same category), so each
+    distinct text is encoded once and its vector reused from cache.
+    """
+    new_documents = list(dict.fromkeys(doc for doc in documents if doc not in cache))
+
+    if new_documents:
+        if static_model is None:
+            # Passing a whole chunk lets sentence-transformers sort by length and pad per mini-batch
+            embeddings = embed(new_documents, show_progress_bar=True)
+        else:
+            embeddings = static_model.encode(new_documents, batch_size=4096)
+        cache.update(zip(new_documents, embeddings))
+
+    return np.stack([cache[doc] for doc in documents])
+
+
+def add_to_collection(collection, documents, metadatas, ids, add_batch_size, static_model=None):
+    """Encode documents chunk by chunk while a writer thread adds the previous chunk to the collection"""
+    if not documents:
+        return
+
+    # Every dataset has its own text prefix, so duplicates only occur within a collection
+    cache = {}
+
+    def write(start, end, embeddings):
+        # Vectors are stored as float32: Chroma's HNSW index has no int8 storage, so
+        # quantizing here would only lose precision without shrinking the index
+        collection.add(
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+            embeddings=chroma_embeddings(embeddings),
+            ids=ids[start:end]
+        )
+
+    # A single writer keeps add() calls ordered; the encoder only runs ahead by a couple of chunks
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        pending = deque()
+        for start in range(0, len(ids), add_batch_size):
+            end = start + add_batch_size
+            embeddings = encode(documents[start:end], cache, static_model)
+            pending.append(writer.submit(write, start, end, embeddings))
+
+            if len(pending) > 2:
+                pending.popleft().result()
+
+        for future in pending:
+            future.result()
+
+
+def main():
+    # Dataset preparation is independent per dataset, so it runs in worker processes.
+    # The workers are forked before the model and the Chroma client exist in this process.
+    with ProcessPoolExecutor(max_workers=len(DATASETS)) as executor:
+        futures = [executor.submit(prepare) for prepare, _ in DATASETS]
+
+        get_model()
+        static_model = load_static_model()
+
+        # Create new ChromaDB
+        if os.path.exists(CHROMA_PATH):
+            print(f"[WARNING] Removing existing {CHROMA_PATH}")
+            import shutil
+            shutil.rmtree(CHROMA_PATH)
+
+        client = PersistentClient(
+            path=CHROMA_PATH,
+            settings=Settings(anonymized_telemetry=False)
+        )
+        # Write in the largest batches Chroma accepts (bounded by SQLite's variable limit);
+        # PersistentClient commits each add(), so no separate persist() is needed
+        add_batch_size = getattr(client, 'max_batch_size', ADD_BATCH_SIZE)
+
+        counts = {}
+        for step, ((_, use_static), future) in enumerate(zip(DATASETS, futures), start=1):
+            collection_name, documents, metadatas, ids = future.result()
+
+            print("\n" + "="*80)
+            print(f"[{step}/{len(DATASETS)}] EMBEDDING {collection_name.upper()}")
+            print("="*80)
+
+            collection = client.create_collection(name=collection_name)
+            add_to_collection(collection, documents, metadatas, ids, add_batch_size,
+                              static_model=static_model if use_static else None)
+
+            counts[collection_name] = collection.count()
+            print(f"[SUCCESS] {collection_name}: {counts[collection_name]} entries")
+
+    # ============================================================================
+    # SUMMARY
+    # ============================================================================
+    print("\n" + "="*80)
+    print("[COMPLETE] CHROMADB CREATION SUMMARY")
+    print("="*80)
+    print(f"Location: {CHROMA_PATH}")
+    print(f"\nCollections created:")
+    for step, (collection_name, count) in enumerate(counts.items(), start=1):
+        print(f"  {step}. {collection_name}: {count:,} entries")
+    print(f"\nTotal entries: {sum(counts.values()):,}")
+    print("\n[NEXT STEPS]")
+    print("1. Backup old chroma_data: mv chroma_data chroma_data_backup")
+    print("2. Replace with new: mv chroma_data_new chroma_data")
+    print("3. Update rag_pipeline.py to load all 5 collections")
+    print("4. Test locally")
+    print("5. Rebuild Docker container")
+    print("6. Deploy to GCP")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,25 @@ Convert zillow_listings_cleaned.csv to ChromaDB with embeddings
 This will create a new ChromaDB collection with PRICE DATA
 """
 
-import pandas as pd
 from chromadb import PersistentClient
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 import os
 
-print("[INFO] Loading Sentence Transformer model...")
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from _dataset_io import has_text, numeric_values, read_columns, text_column
+from _embedder import chroma_embeddings, embed
+
+# Only the listing fields used below are parsed
+ZILLOW_COLUMNS = [
+    'property.address.streetaddress', 'property.address.city', 'property.address.state',
+    'property.address.zipcode', 'property.price.value', 'property.bedrooms', 'property.bathrooms',
+    'property.livingarea', 'property.propertytype', 'property.listing.listingstatus', 'property.zpid',
+    'property.location.latitude', 'property.location.longitude',
+    'property.media.propertyphotolinks.mediumsizelink'
+]
 
 print("[INFO] Reading CSV data...")
-df = pd.read_csv('other_data/zillow_listings_cleaned.csv')
+df = read_columns('other_data/zillow_listings_cleaned.csv', ZILLOW_COLUMNS)
 
 print(f"[SUCCESS] Loaded {len(df)} properties")
 print(f"[INFO] Columns: {list(df.columns[:10])}...")
@@ -32,89 +39,94 @@ client = PersistentClient(
 )
 collection = client.create_collection(name="properties")
 
+# Write in the largest batches Chroma accepts (bounded by SQLite's variable limit);
+# PersistentClient commits each add(), so no separate persist() is needed
+add_batch_size = getattr(client, 'max_batch_size', 5000)
+
 print("\n[INFO] Converting to ChromaDB with embeddings...")
 print("This will take several minutes for 12MB of data...\n")
 
-batch_size = 100
+# Listings without a street address or zpid can't be described or identified; drop them up front
+df = df[has_text(df, 'property.address.streetaddress') & has_text(df, 'property.zpid')]
+print(f"[INFO] {len(df)} listings with an address and zpid")
+
+# Text fields cleaned once per column, numeric fields with their not-missing masks
+addresses = text_column(df, 'property.address.streetaddress').tolist()
+cities = text_column(df, 'property.address.city').tolist()
+states = text_column(df, 'property.address.state').tolist()
+zipcodes = text_column(df, 'property.address.zipcode').tolist()
+property_types = text_column(df, 'property.propertytype', 'Property').tolist()
+listing_statuses = text_column(df, 'property.listing.listingstatus', 'For Sale').tolist()
+zpids = text_column(df, 'property.zpid').tolist()
+photo_urls = text_column(df, 'property.media.propertyphotolinks.mediumsizelink').tolist()
+
+prices, price_mask = numeric_values(df, 'property.price.value')
+beds, bed_mask = numeric_values(df, 'property.bedrooms')
+baths, bath_mask = numeric_values(df, 'property.bathrooms')
+sqfts, sqft_mask = numeric_values(df, 'property.livingarea')
+lats, lat_mask = numeric_values(df, 'property.location.latitude')
+lons, lon_mask = numeric_values(df, 'property.location.longitude')
+
 documents = []
 metadatas = []
 ids = []
 
-for idx, row in tqdm(df.iterrows(), total=len(df), desc="Processing"):
-    try:
-        # Extract key fields
-        address = str(row.get('property.address.streetaddress', '')).strip()
-        city = str(row.get('property.address.city', '')).strip()
-        state = str(row.get('property.address.state', '')).strip()
-        zipcode = str(row.get('property.address.zipcode', '')).strip()
-
-        price = row.get('property.price.value', None)
-        bedrooms = row.get('property.bedrooms', None)
-        bathrooms = row.get('property.bathrooms', None)
-        sqft = row.get('property.livingarea', None)
-        property_type = str(row.get('property.propertytype', 'Property')).strip()
-        listing_status = str(row.get('property.listing.listingstatus', 'For Sale')).strip()
-
-        # Create rich text description for embedding
-        doc_text = f"property | {listing_status} | {address}, {city}, {state} {zipcode}"
-        if price:
-            doc_text += f" | Price: ${price:,.0f}"
-        if bedrooms:
-            doc_text += f" | {int(bedrooms)} bed"
-        if bathrooms:
-            doc_text += f", {int(bathrooms)} bath"
-        if sqft:
-            doc_text += f" | {int(sqft)} sqft"
-        doc_text += f" | {property_type}"
-
-        # Create metadata
-        metadata = {
-            'address': address,
-            'city': city,
-            'state': state,
-            'zipcode': zipcode,
-            'price': float(price) if pd.notna(price) else None,
-            'bedrooms': int(bedrooms) if pd.notna(bedrooms) else None,
-            'bathrooms': int(bathrooms) if pd.notna(bathrooms) else None,
-            'sqft': int(sqft) if pd.notna(sqft) else None,
-            'property_type': property_type,
-            'listing_status': listing_status,
-            'zpid': str(row.get('property.zpid', '')),
-            'latitude': float(row.get('property.location.latitude', 0)) if pd.notna(row.get('property.location.latitude')) else None,
-            'longitude': float(row.get('property.location.longitude', 0)) if pd.notna(row.get('property.location.longitude')) else None,
-            'photo_url': str(row.get('property.media.propertyphotolinks.mediumsizelink', ''))
-        }
-
-        documents.append(doc_text)
-        metadatas.append(metadata)
-        ids.append(f"zillow_property_{idx}")
-
-        # Add batch when it reaches batch_size
-        if len(documents) >= batch_size:
-            embeddings = model.encode(documents).tolist()
-            collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                embeddings=embeddings,
-                ids=ids
-            )
-            documents = []
-            metadatas = []
-            ids = []
-
-    except Exception as e:
-        print(f"[WARNING] Error processing row {idx}: {e}")
-        continue
-
-# Add remaining documents
-if documents:
-    print("\n[INFO] Adding final batch...")
-    embeddings = model.encode(documents).tolist()
+for i, idx in enumerate(tqdm(df.index, total=len(df), desc="Processing")):
+    # Extract key fields
+    address = addresses[i]
+    city = cities[i]
+    state = states[i]
+    zipcode = zipcodes[i]
+
+    property_type = property_types[i]
+    listing_status = listing_statuses[i]
+
+    # Create rich text description for embedding
+    doc_text = f"property | {listing_status} | {address}, {city}, {state} {zipcode}"
+    if price_mask[i] and prices[i]:
+        doc_text += f" | Price: ${prices[i]:,.0f}"
+    if bed_mask[i] and beds[i]:
+        doc_text += f" | {int(beds[i])} bed"
+    if bath_mask[i] and baths[i]:
+        doc_text += f", {int(baths[i])} bath"
+    if sqft_mask[i] and sqfts[i]:
+        doc_text += f" | {int(sqfts[i])} sqft"
+    doc_text += f" | {property_type}"
+
+    # Create metadata
+    metadata = {
+        'address': address,
+        'city': city,
+        'state': state,
+        'zipcode': zipcode,
+        'price': float(prices[i]) if price_mask[i] else None,
+        'bedrooms': int(beds[i]) if bed_mask[i] else None,
+        'bathrooms': int(baths[i]) if bath_mask[i] else None,
+        'sqft': int(sqfts[i]) if sqft_mask[i] else None,
+        'property_type': property_type,
+        'listing_status': listing_status,
+        'zpid': zpids[i],
+        'latitude': float(lats[i]) if lat_mask[i] else None,
+        'longitude': float(lons[i]) if lon_mask[i] else None,
+        'photo_url': photo_urls[i]
+    }
+
+    documents.append(doc_text)
+    metadatas.append(metadata)
+    ids.append(f"zillow_property_{idx}")
+
+# Encode everything in one call so sentence-transformers can length-sort and pad per mini-batch
+print("\n[INFO] Encoding documents...")
+embeddings = embed(documents, show_progress_bar=True)
+
+print("[INFO] Adding documents to collection...")
+for start in range(0, len(ids), add_batch_size):
+    end = start + add_batch_size
     collection.add(
-        documents=documents,
-        metadatas=metadatas,
-        embeddings=embeddings,
-        ids=ids
+        documents=documents[start:end],
+        metadatas=metadatas[start:end],
+        embeddings=chroma_embeddings(embeddings[start:end]),
+        ids=ids[start:end]
     )
 
 print(f"\n[SUCCESS] Successfully created ChromaDB collection with {collection.count()} properties!")
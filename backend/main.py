@@ -395,13 +395,17 @@ async def chat(request: ChatRequest):
                     notification_manager.send_drift_alert(drift_info)
                     mlflow_tracker.log_data_drift(drift_info)
                     
-                    # Evaluate retraining
+                    # Evaluate retraining: cheap check first, full evaluation (with
+                    # every reason, for the alert) only when it fires
                     current_metrics = metrics_collector.get_metrics()
-                    retraining_eval = retraining_trigger.evaluate_retraining_need(
+                    should_retrain, _ = retraining_trigger.should_retrain_fast(
                         current_metrics, drift_info
                     )
+                    retraining_eval = retraining_trigger.evaluate_retraining_need(
+                        current_metrics, drift_info
+                    ) if should_retrain else None
                     
-                    if retraining_eval['should_retrain']:
+                    if retraining_eval and retraining_eval['should_retrain']:
                         notification_manager.send_retraining_alert(retraining_eval)
                         retraining_trigger.trigger_retraining_pipeline(
                             reason=', '.join(retraining_eval['reasons'])
@@ -3,13 +3,53 @@ MLflow Integration for PropBot
 Tracks experiments, model versions, and performance metrics
 """
 import os
+import atexit
 import logging
+import queue
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 import json
 
 logger = logging.getLogger(__name__)
 
+# Queued params/metrics are written in batches of up to LOG_BATCH_SIZE entries,
+# or whatever has arrived after FLUSH_INTERVAL_SECONDS
+LOG_BATCH_SIZE = 500
+FLUSH_INTERVAL_SECONDS = 5.0
+
+# MLflow log_batch limits per call; a run's entries are split to stay within them
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+MAX_ENTITIES_PER_BATCH = 1000
+
+# Queue marker asking the writer thread to write what it holds right away
+_FLUSH = object()
+
+# Methods that do nothing when MLflow tracking is disabled
+NOOP_WHEN_DISABLED = (
+    'start_run', 'log_params', 'log_metrics', 'flush', 'log_model_performance',
+    'log_data_drift', 'register_model', 'transition_model_stage', 'end_run'
+)
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+def _log_batch_chunks(params, metrics):
+    """Split a run's params and metrics into (params, metrics) chunks that fit one log_batch call"""
+    params = list(params.items())
+    i = j = 0
+    while i < len(params) or j < len(metrics):
+        chunk_params = params[i:i + MAX_PARAMS_PER_BATCH]
+        i += len(chunk_params)
+        room = min(MAX_METRICS_PER_BATCH, MAX_ENTITIES_PER_BATCH - len(chunk_params))
+        chunk_metrics = metrics[j:j + room]
+        j += len(chunk_metrics)
+        yield chunk_params, chunk_metrics
+
 class MLflowTracker:
     """MLflow experiment and model tracking"""
     
@@ -21,15 +61,24 @@ class MLflowTracker:
         self.current_run_id = None
         self.model_version = os.getenv('MODEL_VERSION', '1.0.0')
         
+        # log_params/log_metrics only enqueue; a daemon thread does the writing
+        # so the API request path never waits on MLflow
+        self._queue = queue.Queue()
+        if self.mlflow_enabled:
+            threading.Thread(target=self._drain, name='mlflow-writer', daemon=True).start()
+            atexit.register(self.flush)
+        else:
+            # Enablement is fixed for the process, so rather than checking it in every
+            # call, the logging methods are replaced by a no-op on this instance
+            for name in NOOP_WHEN_DISABLED:
+                setattr(self, name, _noop)
+        
         logger.info(f"MLflow tracking: {'enabled' if self.mlflow_enabled else 'disabled'}")
     
     def start_run(self, run_name: Optional[str] = None):
         """Start a new MLflow run"""
-        if not self.mlflow_enabled:
-            return
-        
         try:
-            run_name = run_name or f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            run_name = run_name or f"run_{datetime.now():%Y%m%d_%H%M%S}"
             self.current_run_id = run_name
             
             logger.info(f"📊 Started MLflow run: {run_name}")
@@ -45,41 +94,91 @@ class MLflowTracker:
     
     def log_params(self, params: Dict[str, Any]):
         """Log parameters to MLflow"""
-        if not self.mlflow_enabled:
-            return
-        
         try:
-            logger.info(f"📝 Logging params: {list(params.keys())}")
-            
-            # In production:
-            # import mlflow
-            # for key, value in params.items():
-            #     mlflow.log_param(key, value)
+            self._queue.put_nowait(('params', self.current_run_id, dict(params), None, None))
             
         except Exception as e:
             logger.error(f"Failed to log params: {e}")
     
     def log_metrics(self, metrics: Dict[str, float], step: Optional[int] = None):
         """Log metrics to MLflow"""
-        if not self.mlflow_enabled:
-            return
-        
         try:
-            logger.info(f"📈 Logging metrics at step {step}: {list(metrics.keys())}")
-            
-            # In production:
-            # import mlflow
-            # for key, value in metrics.items():
-            #     mlflow.log_metric(key, value, step=step)
+            timestamp = int(time.time() * 1000)
+            self._queue.put_nowait(('metrics', self.current_run_id, dict(metrics), step, timestamp))
             
         except Exception as e:
             logger.error(f"Failed to log metrics: {e}")
     
+    def flush(self, timeout: float = 10.0):
+        """Wait (up to timeout seconds) for queued params and metrics to be written"""
+        self._queue.put_nowait(_FLUSH)
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+    
+    def _drain(self):
+        """Writer thread: collect queued entries into batches and write them"""
+        while True:
+            batch = []
+            item = self._queue.get()
+            
+            # Any failure drops this batch but keeps the thread alive for the next one
+            try:
+                deadline = time.monotonic() + FLUSH_INTERVAL_SECONDS
+                
+                while item is not _FLUSH:
+                    batch.append(item)
+                    if len(batch) >= LOG_BATCH_SIZE:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                
+                self._write_batch(batch)
+                
+            except Exception as e:
+                logger.error(f"MLflow writer failed on a batch of {len(batch)} entries: {e}")
+            
+            finally:
+                # Every get() above is matched here, including a _FLUSH marker
+                for _ in range(len(batch) + (item is _FLUSH)):
+                    self._queue.task_done()
+    
+    def _write_batch(self, batch):
+        """Write queued params and metrics, in as few log_batch calls per run as MLflow's limits allow"""
+        runs = {}
+        for kind, run_id, values, step, timestamp in batch:
+            run = runs.setdefault(run_id, {'params': {}, 'metrics': []})
+            if kind == 'params':
+                run['params'].update(values)
+            else:
+                run['metrics'].extend((key, value, timestamp, step) for key, value in values.items())
+        
+        for run_id, run in runs.items():
+            for params, metrics in _log_batch_chunks(run['params'], run['metrics']):
+                try:
+                    if logger.isEnabledFor(logging.INFO):
+                        if params:
+                            logger.info("📝 Logging %d params", len(params))
+                        if metrics:
+                            logger.info("📈 Logging %d metric values", len(metrics))
+                    
+                    # In production (one log_batch round-trip instead of one call per key):
+                    # from mlflow.entities import Metric, Param
+                    # from mlflow.tracking import MlflowClient
+                    # MlflowClient().log_batch(
+                    #     run_id=run_id,
+                    #     metrics=[Metric(key, float(value), timestamp, step or 0)
+                    #              for key, value, timestamp, step in metrics],
+                    #     params=[Param(key, str(value)) for key, value in params]
+                    # )
+                    
+                except Exception as e:
+                    logger.error(f"Failed to write MLflow batch: {e}")
+    
     def log_model_performance(self, performance_data: Dict[str, Any]):
         """Log model performance metrics"""
-        if not self.mlflow_enabled:
-            return
-        
         try:
             metrics = {
                 'success_rate': performance_data.get('success_rate_percent', 0) / 100,
@@ -98,9 +197,6 @@ class MLflowTracker:
     
     def log_data_drift(self, drift_data: Dict[str, Any]):
         """Log data drift metrics"""
-        if not self.mlflow_enabled:
-            return
-        
         try:
             metrics = {
                 'drift_detected': 1.0 if drift_data.get('drift_detected') else 0.0,
@@ -116,9 +212,6 @@ class MLflowTracker:
     
     def register_model(self, model_name: str, model_version: str):
         """Register a model in MLflow Model Registry"""
-        if not self.mlflow_enabled:
-            return
-        
         try:
             logger.info(f"📦 Registering model: {model_name} v{model_version}")
             
@@ -136,9 +229,6 @@ class MLflowTracker:
     
     def transition_model_stage(self, model_name: str, version: str, stage: str):
         """Transition model to a different stage (Staging, Production, Archived)"""
-        if not self.mlflow_enabled:
-            return
-        
         try:
             logger.info(f"🔄 Transitioning {model_name} v{version} to {stage}")
             
@@ -158,9 +248,6 @@ class MLflowTracker:
     
     def end_run(self):
         """End the current MLflow run"""
-        if not self.mlflow_enabled:
-            return
-        
         try:
             logger.info(f"🏁 Ending MLflow run: {self.current_run_id}")
             
@@ -198,9 +285,12 @@ class MLflowTracker:
             logger.error(f"Failed to get model info: {e}")
             return {'error': str(e)}
 
-# Global MLflow tracker
-mlflow_tracker = MLflowTracker()
+# Global MLflow tracker, created on first use rather than at import
+_mlflow_tracker = None
 
 def get_mlflow_tracker() -> MLflowTracker:
     """Get the global MLflow tracker"""
-    return mlflow_tracker
\ No newline at end of file
+    global _mlflow_tracker
+    if _mlflow_tracker is None:
+        _mlflow_tracker = MLflowTracker()
+    return _mlflow_tracker
\ No newline at end of file
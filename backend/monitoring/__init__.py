@@ -1,5 +1,16 @@
-from .metrics import get_metrics_collector
-from .cloud_logger import get_structured_logger
-from .drift_detector import get_drift_detector
+import importlib
+
+# Submodule providing each accessor; imported on first access so that importing
+# one monitoring module doesn't load the others (and numpy) as well
+_ACCESSORS = {
+    'get_metrics_collector': '.metrics',
+    'get_structured_logger': '.cloud_logger',
+    'get_drift_detector': '.drift_detector',
+}
+
+def __getattr__(name):
+    if name in _ACCESSORS:
+        return getattr(importlib.import_module(_ACCESSORS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = ['get_metrics_collector', 'get_structured_logger', 'get_drift_detector']
\ No newline at end of file
@@ -4,11 +4,110 @@ Structured logging for production monitoring
 """
 import logging
 import json
+import os
+import struct
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Iterator
+
+# orjson is a C-extension encoder, far cheaper than stdlib json on the request path
+try:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    _orjson_dumps = orjson.dumps
+
+    def _dumps(log_entry: Dict[str, Any]) -> str:
+        return _orjson_dumps(log_entry, option=_ORJSON_OPTIONS).decode()
+except ImportError:
+    _dumps = json.dumps
+
+# msgspec is only needed for the optional msgpack frame sink
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Big-endian uint32 payload length in front of every msgpack frame
+_FRAME_HEADER = struct.Struct('>I')
 
 logger = logging.getLogger(__name__)
 
+
+def _iso_now() -> str:
+    """Current time as an ISO-8601 string, at millisecond precision"""
+    return datetime.now().isoformat(timespec='milliseconds')
+
+
+class _JsonMessage:
+    """Log message that serializes its entry only when a handler formats the record"""
+    __slots__ = ('entry',)
+    
+    def __init__(self, entry: Dict[str, Any]):
+        self.entry = entry
+    
+    def __str__(self) -> str:
+        return _dumps(self.entry)
+
+
+def _emit(level: int, log_entry: Dict[str, Any]):
+    """Log an entry as JSON text, also passing the dict as json_fields so
+    google-cloud-logging's structured handler can use it without re-parsing"""
+    logger.log(level, _JsonMessage(log_entry), extra={'json_fields': log_entry})
+
+
+def _encode_numpy(obj):
+    """msgspec hook for numpy scalars in drift metrics"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise NotImplementedError(f"Cannot encode {type(obj).__name__}")
+
+
+class MsgpackFrameHandler(logging.Handler):
+    """Writes structured entries as length-prefixed msgpack frames to a binary
+    stream (a file, or socket.makefile('wb')) instead of JSON text lines.
+    
+    Off by default: Cloud Logging ingests the JSON lines on stdout. Set
+    STRUCTURED_LOG_FRAMES_PATH to also write frames for a log shipper that reads
+    them; read_msgpack_frames() decodes the result.
+    """
+    
+    def __init__(self, stream: BinaryIO):
+        if msgspec is None:
+            raise ImportError("msgspec is required for MsgpackFrameHandler")
+        super().__init__()
+        self.stream = stream
+        self._encode = msgspec.msgpack.Encoder(enc_hook=_encode_numpy).encode
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = getattr(record, 'json_fields', None)
+            if entry is None:
+                entry = {'message': record.getMessage(), 'severity': record.levelname}
+            
+            payload = self._encode(entry)
+            self.stream.write(_FRAME_HEADER.pack(len(payload)) + payload)
+            self.stream.flush()
+        except Exception:
+            self.handleError(record)
+    
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            super().close()
+
+
+def read_msgpack_frames(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of a stream written by MsgpackFrameHandler"""
+    decode = msgspec.msgpack.Decoder().decode
+    while True:
+        header = stream.read(_FRAME_HEADER.size)
+        if len(header) < _FRAME_HEADER.size:
+            return
+        (size,) = _FRAME_HEADER.unpack(header)
+        yield decode(stream.read(size))
+
+
 class StructuredLogger:
     """Structured logging for Cloud Logging"""
     
@@ -16,8 +115,11 @@ class StructuredLogger:
     def log_api_request(query: str, response_time: float, 
                        success: bool, properties_count: int):
         """Log API request with structured data"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _iso_now(),
             'type': 'api_request',
             'query': query[:100],  # Truncate long queries
             'response_time_seconds': round(response_time, 3),
@@ -26,14 +128,17 @@ class StructuredLogger:
             'severity': 'INFO' if success else 'ERROR'
         }
         
-        logger.info(json.dumps(log_entry))
+        _emit(logging.INFO, log_entry)
     
     @staticmethod
     def log_chromadb_query(collection: str, query: str, 
                           results_count: int, query_time: float):
         """Log ChromaDB query"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _iso_now(),
             'type': 'chromadb_query',
             'collection': collection,
             'query': query[:50],
@@ -42,13 +147,13 @@ class StructuredLogger:
             'severity': 'INFO'
         }
         
-        logger.info(json.dumps(log_entry))
+        _emit(logging.INFO, log_entry)
     
     @staticmethod
     def log_error(error_type: str, error_message: str, context: Dict[str, Any] = None):
         """Log error with context"""
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _iso_now(),
             'type': 'error',
             'error_type': error_type,
             'error_message': error_message,
@@ -56,37 +161,47 @@ class StructuredLogger:
             'severity': 'ERROR'
         }
         
-        logger.error(json.dumps(log_entry))
+        _emit(logging.ERROR, log_entry)
     
     @staticmethod
     def log_drift_detection(drift_detected: bool, metrics: Dict[str, Any]):
         """Log data drift detection results"""
+        level = logging.WARNING if drift_detected else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _iso_now(),
             'type': 'drift_detection',
             'drift_detected': drift_detected,
             'metrics': metrics,
             'severity': 'WARNING' if drift_detected else 'INFO'
         }
         
-        logger.warning(json.dumps(log_entry)) if drift_detected else logger.info(json.dumps(log_entry))
+        _emit(level, log_entry)
     
     @staticmethod
     def log_retraining_trigger(reason: str, metrics: Dict[str, Any]):
         """Log model retraining trigger"""
         log_entry = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _iso_now(),
             'type': 'retraining_trigger',
             'reason': reason,
             'metrics': metrics,
             'severity': 'WARNING'
         }
         
-        logger.warning(json.dumps(log_entry))
+        _emit(logging.WARNING, log_entry)
 
-# Global structured logger
-structured_logger = StructuredLogger()
+# Global structured logger, created on first use rather than at import
+_structured_logger = None
 
 def get_structured_logger() -> StructuredLogger:
     """Get the global structured logger"""
-    return structured_logger
\ No newline at end of file
+    global _structured_logger
+    if _structured_logger is None:
+        frames_path = os.getenv('STRUCTURED_LOG_FRAMES_PATH')
+        if frames_path:
+            logger.addHandler(MsgpackFrameHandler(open(frames_path, 'ab')))
+        _structured_logger = StructuredLogger()
+    return _structured_logger
\ No newline at end of file
@@ -3,13 +3,17 @@ Data Drift Detection for PropBot
 Monitors query patterns and detects distribution shifts
 """
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from collections import Counter
+from typing import Dict, Any
+from collections import Counter, deque
+from statistics import fmean
 import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Number of queries in the baseline and in the current window that are compared
+STATS_WINDOW = 50
+
 class DriftDetector:
     """Detects data drift in user queries and system behavior"""
     
@@ -22,43 +26,73 @@ class DriftDetector:
         self.window_size = window_size
         self.drift_threshold = drift_threshold
         
-        # Store recent queries and their characteristics
-        self.recent_queries = []
+        # Recent queries as parallel ring buffers (struct of arrays): numeric features
+        # live in numpy arrays so window statistics run as single C loops
+        self._query_lengths = np.zeros(window_size, dtype=np.int32)
+        self._properties_counts = np.zeros(window_size, dtype=np.float64)
+        self._response_times = np.zeros(window_size, dtype=np.float64)
+        self._next_slot = 0
+        self._count = 0
+        
+        # Query type / neighborhood counts over the newest STATS_WINDOW queries, updated
+        # as queries enter and leave that window instead of recounted on every detect_drift
+        self._recent_categories = deque()  # (query_type, neighborhood or None)
+        self._type_counts = Counter()
+        self._neighborhood_counts = Counter()
+        
+        # Stable array slot per query type, so distributions compare as aligned vectors
+        self._type_index: Dict[str, int] = {}
+        
         self.baseline_stats = None
-        self.drift_history = []
+        # (detected_at, result) per drift event, oldest first
+        self.drift_history = deque(maxlen=1000)
     
     def record_query(self, query_data: Dict[str, Any]):
         """Record a query for drift analysis"""
-        query_data['timestamp'] = datetime.now()
-        self.recent_queries.append(query_data)
-        
-        # Keep only recent window
-        if len(self.recent_queries) > self.window_size:
-            self.recent_queries = self.recent_queries[-self.window_size:]
-        
-        # Set baseline after collecting enough data
-        if self.baseline_stats is None and len(self.recent_queries) >= 50:
-            self.baseline_stats = self._calculate_statistics(self.recent_queries)
+        slot = self._next_slot
+        self._query_lengths[slot] = len(query_data.get('query', ''))
+        self._properties_counts[slot] = query_data.get('properties_count', 0)
+        self._response_times[slot] = query_data.get('response_time', 0)
+        self._next_slot = (slot + 1) % self.window_size
+        self._count = min(self._count + 1, self.window_size)
+        
+        if len(self._recent_categories) == STATS_WINDOW:
+            old_type, old_neighborhood = self._recent_categories.popleft()
+            self._uncount(self._type_counts, old_type)
+            if old_neighborhood is not None:
+                self._uncount(self._neighborhood_counts, old_neighborhood)
+        
+        query_type = query_data.get('query_type', 'unknown')
+        neighborhood = query_data.get('neighborhood')
+        self._recent_categories.append((query_type, neighborhood))
+        self._type_counts[query_type] += 1
+        if neighborhood is not None:
+            self._neighborhood_counts[neighborhood] += 1
+        
+        # Set baseline once the first STATS_WINDOW queries are in
+        if self.baseline_stats is None and self._count >= STATS_WINDOW:
+            self.baseline_stats = self._calculate_statistics()
             logger.info("📊 Baseline statistics established")
     
     def detect_drift(self) -> Dict[str, Any]:
         """Detect if data drift has occurred"""
-        if len(self.recent_queries) < 50:
+        if self._count < STATS_WINDOW:
             return {
                 'drift_detected': False,
                 'reason': 'Insufficient data for drift detection',
-                'samples': len(self.recent_queries)
+                'samples': self._count
             }
         
         if self.baseline_stats is None:
-            self.baseline_stats = self._calculate_statistics(self.recent_queries[:50])
+            self.baseline_stats = self._calculate_statistics()
         
         # Calculate current statistics
-        current_stats = self._calculate_statistics(self.recent_queries[-50:])
+        current_stats = self._calculate_statistics()
         
         # Compare distributions
         drift_score = self._calculate_drift_score(self.baseline_stats, current_stats)
         drift_detected = drift_score > self.drift_threshold
+        now = datetime.now()
         
         result = {
             'drift_detected': drift_detected,
@@ -66,39 +100,49 @@ class DriftDetector:
             'threshold': self.drift_threshold,
             'baseline_stats': self.baseline_stats,
             'current_stats': current_stats,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now.isoformat()
         }
         
-        # Record drift event
+        # Record drift event (with the datetime itself, so it never needs re-parsing)
         if drift_detected:
-            self.drift_history.append(result)
+            self.drift_history.append((now, result))
             logger.warning(f"⚠️ Data drift detected! Score: {drift_score:.3f}")
         
         return result
     
-    def _calculate_statistics(self, queries: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate statistical features of queries"""
-        # Extract features
-        query_lengths = [len(q.get('query', '')) for q in queries]
-        properties_counts = [q.get('properties_count', 0) for q in queries]
-        response_times = [q.get('response_time', 0) for q in queries]
-        
-        # Query type distribution
-        query_types = [q.get('query_type', 'unknown') for q in queries]
-        type_distribution = dict(Counter(query_types))
+    @staticmethod
+    def _uncount(counts: Counter, key: str):
+        """Decrement a count, dropping the key when it reaches zero"""
+        counts[key] -= 1
+        if counts[key] <= 0:
+            del counts[key]
+    
+    def _calculate_statistics(self) -> Dict[str, Any]:
+        """Calculate statistical features of the newest STATS_WINDOW queries"""
+        n = min(STATS_WINDOW, self._count)
+        if n == 0:
+            return {
+                'avg_query_length': 0,
+                'std_query_length': 0,
+                'avg_properties_returned': 0,
+                'avg_response_time': 0,
+                'query_type_distribution': {},
+                'neighborhood_distribution': {},
+                'total_queries': 0
+            }
         
-        # Neighborhood distribution (if available)
-        neighborhoods = [q.get('neighborhood', 'unknown') for q in queries if 'neighborhood' in q]
-        neighborhood_dist = dict(Counter(neighborhoods))
+        # Ring-buffer slots of the selected queries
+        slots = np.arange(self._next_slot - n, self._next_slot) % self.window_size
+        query_lengths = self._query_lengths[slots]
         
         return {
-            'avg_query_length': np.mean(query_lengths) if query_lengths else 0,
-            'std_query_length': np.std(query_lengths) if query_lengths else 0,
-            'avg_properties_returned': np.mean(properties_counts) if properties_counts else 0,
-            'avg_response_time': np.mean(response_times) if response_times else 0,
-            'query_type_distribution': type_distribution,
-            'neighborhood_distribution': neighborhood_dist,
-            'total_queries': len(queries)
+            'avg_query_length': query_lengths.mean(),
+            'std_query_length': query_lengths.std(),
+            'avg_properties_returned': self._properties_counts[slots].mean(),
+            'avg_response_time': self._response_times[slots].mean(),
+            'query_type_distribution': dict(self._type_counts),
+            'neighborhood_distribution': dict(self._neighborhood_counts),
+            'total_queries': n
         }
     
     def _calculate_drift_score(self, baseline: Dict[str, Any], 
@@ -125,49 +169,55 @@ class DriftDetector:
             type_drift = self._distribution_difference(baseline_types, current_types)
             scores.append(type_drift)
         
-        # Average drift score
-        return np.mean(scores) if scores else 0.0
+        # Average drift score (at most four values, so no numpy array round-trip)
+        return fmean(scores) if scores else 0.0
+    
+    def _distribution_vector(self, dist: Dict[str, int]) -> np.ndarray:
+        """Counts of a distribution as an array aligned on the query type index"""
+        vector = np.zeros(len(self._type_index))
+        vector[[self._type_index[key] for key in dist]] = list(dist.values())
+        return vector
     
     def _distribution_difference(self, dist1: Dict[str, int], 
                                  dist2: Dict[str, int]) -> float:
         """Calculate difference between two distributions"""
+        for key in (*dist1, *dist2):
+            if key not in self._type_index:
+                self._type_index[key] = len(self._type_index)
+        
+        p = self._distribution_vector(dist1)
+        q = self._distribution_vector(dist2)
+        
         # Normalize distributions
-        total1 = sum(dist1.values())
-        total2 = sum(dist2.values())
+        total1 = p.sum()
+        total2 = q.sum()
         
         if total1 == 0 or total2 == 0:
             return 0.0
         
-        norm_dist1 = {k: v/total1 for k, v in dist1.items()}
-        norm_dist2 = {k: v/total2 for k, v in dist2.items()}
-        
-        # Calculate Jensen-Shannon divergence (simplified)
-        all_keys = set(norm_dist1.keys()) | set(norm_dist2.keys())
-        
-        diff_sum = 0
-        for key in all_keys:
-            p = norm_dist1.get(key, 0)
-            q = norm_dist2.get(key, 0)
-            diff_sum += abs(p - q)
-        
-        return diff_sum / 2  # Normalize to [0, 1]
+        # Total variation distance (simplified Jensen-Shannon), in [0, 1]
+        return 0.5 * float(np.abs(p / total1 - q / total2).sum())
     
     def should_trigger_retraining(self) -> bool:
         """Determine if retraining should be triggered"""
-        # Check recent drift history
-        recent_drifts = [d for d in self.drift_history 
-                        if datetime.fromisoformat(d['timestamp']) > datetime.now() - timedelta(hours=24)]
+        # Events are in time order, so those older than 24 hours are dropped from the left
+        cutoff = datetime.now() - timedelta(hours=24)
+        while self.drift_history and self.drift_history[0][0] <= cutoff:
+            self.drift_history.popleft()
         
         # Trigger if multiple drifts detected in last 24 hours
-        if len(recent_drifts) >= 3:
+        if len(self.drift_history) >= 3:
             logger.warning("🔄 Multiple drift events detected - retraining recommended")
             return True
         
         return False
 
-# Global drift detector
-drift_detector = DriftDetector(window_size=100, drift_threshold=0.3)
+# Global drift detector, created on first use rather than at import
+_drift_detector = None
 
 def get_drift_detector() -> DriftDetector:
     """Get the global drift detector"""
-    return drift_detector
\ No newline at end of file
+    global _drift_detector
+    if _drift_detector is None:
+        _drift_detector = DriftDetector(window_size=100, drift_threshold=0.3)
+    return _drift_detector
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+API Metrics Collection for PropBot
+Tracks request volume, success rate, and response times
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Calls needed before rates (error rate for retraining) are judged meaningful
+MIN_SAMPLES_FOR_EVALUATION = 100
+
+class MetricsCollector:
+    """Collects API performance metrics"""
+    
+    def __init__(self):
+        self.start_time = datetime.now()
+        
+        self.metrics = {
+            'api_calls': 0,
+            'successful_responses': 0,
+            'failed_responses': 0,
+            'query_types': defaultdict(int)
+        }
+        
+        # Guards the multi-field update in record_api_call and the reads in
+        # get_metrics against concurrent request threads
+        self._lock = threading.Lock()
+        
+        # Running totals instead of per-request lists: averages are O(1) to read
+        # and memory stays constant on a long-running service
+        self._response_time_sum = 0.0
+        self._response_time_count = 0
+        self._properties_sum = 0
+        self._properties_count = 0
+    
+    def record_api_call(self, success: bool, response_time: float,
+                        properties_count: int = 0, query_type: str = 'unknown'):
+        """Record a single API call"""
+        metrics = self.metrics
+        
+        with self._lock:
+            metrics['api_calls'] += 1
+            
+            if success:
+                metrics['successful_responses'] += 1
+                self._properties_sum += properties_count
+                self._properties_count += 1
+            else:
+                metrics['failed_responses'] += 1
+            
+            self._response_time_sum += response_time
+            self._response_time_count += 1
+            
+            metrics['query_types'][query_type] += 1
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get current performance metrics"""
+        with self._lock:
+            total_calls = self.metrics['api_calls']
+            successful = self.metrics['successful_responses']
+            failed = self.metrics['failed_responses']
+            response_time_sum, response_time_count = self._response_time_sum, self._response_time_count
+            properties_sum, properties_count = self._properties_sum, self._properties_count
+            query_types = dict(self.metrics['query_types'])
+        
+        return {
+            'total_api_calls': total_calls,
+            'successful_responses': successful,
+            'failed_responses': failed,
+            'success_rate_percent': successful / total_calls * 100 if total_calls else 100.0,
+            'error_rate_percent': failed / total_calls * 100 if total_calls else 0.0,
+            'has_enough_samples': total_calls >= MIN_SAMPLES_FOR_EVALUATION,
+            'avg_response_time_seconds': (
+                response_time_sum / response_time_count if response_time_count else 0
+            ),
+            'avg_properties_returned': properties_sum / properties_count if properties_count else 0,
+            'query_types': query_types,
+            'uptime_seconds': (datetime.now() - self.start_time).total_seconds(),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def check_health(self) -> Dict[str, Any]:
+        """Check system health against performance thresholds"""
+        metrics = self.get_metrics()
+        issues = []
+        
+        if metrics['success_rate_percent'] < 85:
+            issues.append(f"Low success rate: {metrics['success_rate_percent']:.1f}%")
+        
+        if metrics['avg_response_time_seconds'] > 5.0:
+            issues.append(f"Slow responses: {metrics['avg_response_time_seconds']:.2f}s average")
+        
+        return {
+            'status': 'healthy' if not issues else 'degraded',
+            'issues': issues,
+            'total_api_calls': metrics['total_api_calls'],
+            'uptime_seconds': metrics['uptime_seconds'],
+            'timestamp': metrics['timestamp']
+        }
+
+# Global metrics collector, created on first use rather than at import
+_metrics_collector = None
+
+def get_metrics_collector() -> MetricsCollector:
+    """Get the global metrics collector"""
+    global _metrics_collector
+    if _metrics_collector is None:
+        _metrics_collector = MetricsCollector()
+    return _metrics_collector
\ No newline at end of file
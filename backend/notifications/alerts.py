@@ -3,122 +3,224 @@ Notification System for PropBot
 Sends alerts for drift detection, retraining, and system issues
 """
 import os
+import atexit
 import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
 from datetime import datetime
-from typing import Dict, Any, List
+from itertools import islice
+from typing import Dict, Any, List, Tuple
 import json
 
 logger = logging.getLogger(__name__)
 
+# Notifications waiting for Slack/email delivery; the oldest is dropped when full
+OUTBOX_SIZE = 1000
+
+# Message templates, filled with a single str.format call per notification
+DEPLOYMENT_TEMPLATE = (
+    "🎉 PropBot deployed successfully!\n"
+    "Version: {version}\n"
+    "Environment: {environment}\n"
+    "URL: {url}"
+)
+
+DRIFT_TEMPLATE = (
+    "⚠️ Data Drift Detected!\n\n"
+    "Drift Score: {drift_score:.3f}\n"
+    "Threshold: {threshold:.3f}\n"
+    "Time: {timestamp}\n\n"
+    "Action Required: Review recent data patterns and consider retraining."
+)
+
+RETRAINING_TEMPLATE = (
+    "🔄 Model Retraining Triggered!\n\n"
+    "{reasons}"
+    "\nTriggered at: {timestamp}"
+)
+
+PERFORMANCE_TEMPLATE = (
+    "⚠️ Performance Issue Detected!\n\n"
+    "Success Rate: {success_rate_percent:.1f}%\n"
+    "Avg Response Time: {avg_response_time_seconds:.2f}s\n"
+    "Failed Responses: {failed_responses}\n"
+    "Total API Calls: {total_api_calls}"
+)
+
+# Most severe first; a batch is sent with the highest severity it contains
+SEVERITY_ORDER = ('error', 'warning', 'info')
+
 class NotificationManager:
     """Manages notifications for system events"""
     
     def __init__(self):
-        self.notification_history = []
+        # Only the last 1000 notifications are kept; stats count the same window
+        # and are updated as notifications enter and leave it
+        self.notification_history = deque(maxlen=1000)
+        self._by_type = Counter()
+        self._by_severity = Counter()
+        # Alerts arrive from the event loop and from threadpool routes; the lock keeps
+        # the evict/append/count steps (and reads of them) from interleaving
+        self._history_lock = threading.Lock()
         self.email_enabled = os.getenv('EMAIL_NOTIFICATIONS_ENABLED', 'false').lower() == 'true'
         self.slack_enabled = os.getenv('SLACK_NOTIFICATIONS_ENABLED', 'false').lower() == 'true'
         self.slack_webhook = os.getenv('SLACK_WEBHOOK_URL', '')
+        
+        # One pooled session for every Slack post, so alert bursts reuse the open
+        # TLS connection; requests is only imported when Slack is configured
+        self._session = None
+        if self.slack_enabled and self.slack_webhook:
+            try:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                self._session = requests.Session()
+                self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+            except ImportError as e:
+                logger.error(f"Slack notifications unavailable: {e}")
+        
+        # Slack/email delivery runs on a daemon thread, so the request that raised
+        # an alert doesn't wait on external HTTP round-trips
+        self._external_enabled = self.email_enabled or bool(self.slack_enabled and self.slack_webhook)
+        self._outbox = queue.Queue(maxsize=OUTBOX_SIZE)
+        if self._external_enabled:
+            threading.Thread(target=self._send_loop, name='notification-sender', daemon=True).start()
+            atexit.register(self.flush)
+        
+        # Notification type -> (message formatter, severity), for send_batch
+        self._kinds = {
+            'drift_alert': (self._format_drift_message, 'warning'),
+            'retraining_alert': (self._format_retraining_message, 'info'),
+            'performance_alert': (self._format_performance_message, 'error'),
+            'deployment_success': (self._format_deployment_message, 'info'),
+        }
     
     def send_drift_alert(self, drift_info: Dict[str, Any]):
         """Send alert when data drift is detected"""
         message = self._format_drift_message(drift_info)
         
-        notification = {
-            'type': 'drift_alert',
-            'severity': 'warning',
-            'message': message,
-            'timestamp': datetime.now().isoformat(),
-            'data': drift_info
-        }
-        
-        self._dispatch_notification(notification)
+        self._dispatch_notification(self._build_notification('drift_alert', 'warning', message, drift_info))
     
     def send_retraining_alert(self, retraining_info: Dict[str, Any]):
         """Send alert when retraining is triggered"""
         message = self._format_retraining_message(retraining_info)
         
-        notification = {
-            'type': 'retraining_alert',
-            'severity': 'info',
-            'message': message,
-            'timestamp': datetime.now().isoformat(),
-            'data': retraining_info
-        }
-        
-        self._dispatch_notification(notification)
+        self._dispatch_notification(self._build_notification('retraining_alert', 'info', message, retraining_info))
     
     def send_performance_alert(self, metrics: Dict[str, Any]):
         """Send alert for performance issues"""
         message = self._format_performance_message(metrics)
         
-        notification = {
-            'type': 'performance_alert',
-            'severity': 'error',
-            'message': message,
-            'timestamp': datetime.now().isoformat(),
-            'data': metrics
-        }
-        
-        self._dispatch_notification(notification)
+        self._dispatch_notification(self._build_notification('performance_alert', 'error', message, metrics))
     
     def send_deployment_success(self, deployment_info: Dict[str, Any]):
         """Send notification for successful deployment"""
-        message = f"🎉 PropBot deployed successfully!\n"
-        message += f"Version: {deployment_info.get('version', 'unknown')}\n"
-        message += f"Environment: {deployment_info.get('environment', 'production')}\n"
-        message += f"URL: {deployment_info.get('url', 'N/A')}"
-        
-        notification = {
-            'type': 'deployment_success',
-            'severity': 'info',
+        message = self._format_deployment_message(deployment_info)
+        
+        self._dispatch_notification(self._build_notification('deployment_success', 'info', message, deployment_info))
+    
+    def send_batch(self, events: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Send several notifications as one external message
+        
+        Args:
+            events: (notification type, data) pairs, using the types of the send_*
+                methods ('drift_alert', 'retraining_alert', 'performance_alert',
+                'deployment_success')
+        
+        Each notification is recorded and logged on its own; Slack/email receive a
+        single message with all of them.
+        """
+        notifications = []
+        for notification_type, data in events:
+            format_message, severity = self._kinds[notification_type]
+            notifications.append(self._build_notification(notification_type, severity, format_message(data), data))
+        
+        if not notifications:
+            return
+        
+        for notification in notifications:
+            self._record_notification(notification)
+        
+        if self._external_enabled:
+            if len(notifications) == 1:
+                self._enqueue(notifications[0])
+            else:
+                severity = min((n['severity'] for n in notifications), key=SEVERITY_ORDER.index)
+                message = '\n\n'.join(n['message'] for n in notifications)
+                self._enqueue(self._build_notification('batch', severity, message, {'count': len(notifications)}))
+    
+    @staticmethod
+    def _build_notification(notification_type: str, severity: str, message: str,
+                            data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a notification record with a millisecond timestamp"""
+        return {
+            'type': notification_type,
+            'severity': severity,
             'message': message,
-            'timestamp': datetime.now().isoformat(),
-            'data': deployment_info
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'data': data
         }
-        
-        self._dispatch_notification(notification)
+    
+    def _format_deployment_message(self, deployment_info: Dict[str, Any]) -> str:
+        """Format deployment success message"""
+        return DEPLOYMENT_TEMPLATE.format(
+            version=deployment_info.get('version', 'unknown'),
+            environment=deployment_info.get('environment', 'production'),
+            url=deployment_info.get('url', 'N/A')
+        )
     
     def _format_drift_message(self, drift_info: Dict[str, Any]) -> str:
         """Format drift detection message"""
-        message = "⚠️ Data Drift Detected!\n\n"
-        message += f"Drift Score: {drift_info.get('drift_score', 0):.3f}\n"
-        message += f"Threshold: {drift_info.get('threshold', 0):.3f}\n"
-        message += f"Time: {drift_info.get('timestamp', 'N/A')}\n\n"
-        message += "Action Required: Review recent data patterns and consider retraining."
-        
-        return message
+        return DRIFT_TEMPLATE.format(
+            drift_score=drift_info.get('drift_score', 0),
+            threshold=drift_info.get('threshold', 0),
+            timestamp=drift_info.get('timestamp', 'N/A')
+        )
     
     def _format_retraining_message(self, retraining_info: Dict[str, Any]) -> str:
         """Format retraining trigger message"""
-        message = "🔄 Model Retraining Triggered!\n\n"
-        
+        reasons = ''
         if 'reasons' in retraining_info:
-            message += "Reasons:\n"
-            for reason in retraining_info['reasons']:
-                message += f"  • {reason}\n"
-        
-        message += f"\nTriggered at: {retraining_info.get('timestamp', 'N/A')}"
+            reasons = "Reasons:\n" + ''.join(f"  • {reason}\n" for reason in retraining_info['reasons'])
         
-        return message
+        return RETRAINING_TEMPLATE.format(
+            reasons=reasons,
+            timestamp=retraining_info.get('timestamp', 'N/A')
+        )
     
     def _format_performance_message(self, metrics: Dict[str, Any]) -> str:
         """Format performance alert message"""
-        message = "⚠️ Performance Issue Detected!\n\n"
-        message += f"Success Rate: {metrics.get('success_rate_percent', 0):.1f}%\n"
-        message += f"Avg Response Time: {metrics.get('avg_response_time_seconds', 0):.2f}s\n"
-        message += f"Failed Responses: {metrics.get('failed_responses', 0)}\n"
-        message += f"Total API Calls: {metrics.get('total_api_calls', 0)}"
-        
-        return message
+        return PERFORMANCE_TEMPLATE.format(
+            success_rate_percent=metrics.get('success_rate_percent', 0),
+            avg_response_time_seconds=metrics.get('avg_response_time_seconds', 0),
+            failed_responses=metrics.get('failed_responses', 0),
+            total_api_calls=metrics.get('total_api_calls', 0)
+        )
     
     def _dispatch_notification(self, notification: Dict[str, Any]):
         """Dispatch notification through configured channels"""
-        # Record notification
-        self.notification_history.append(notification)
+        self._record_notification(notification)
         
-        # Keep only last 1000 notifications
-        if len(self.notification_history) > 1000:
-            self.notification_history = self.notification_history[-1000:]
+        # Hand off to the sender thread for external services (if configured)
+        if self._external_enabled:
+            self._enqueue(notification)
+    
+    def _record_notification(self, notification: Dict[str, Any]):
+        """Add a notification to the history and stats, and log it"""
+        # Record notification
+        history = self.notification_history
+        with self._history_lock:
+            if len(history) == history.maxlen:
+                evicted = history[0]
+                self._uncount(self._by_type, evicted.get('type', 'unknown'))
+                self._uncount(self._by_severity, evicted.get('severity', 'unknown'))
+            
+            history.append(notification)
+            self._by_type[notification.get('type', 'unknown')] += 1
+            self._by_severity[notification.get('severity', 'unknown')] += 1
         
         # Log notification
         severity = notification['severity']
@@ -130,13 +232,42 @@ class NotificationManager:
             logger.warning(message)
         else:
             logger.info(message)
-        
-        # Send to external services (if configured)
-        if self.email_enabled:
-            self._send_email(notification)
-        
-        if self.slack_enabled and self.slack_webhook:
-            self._send_slack(notification)
+    
+    def _enqueue(self, notification: Dict[str, Any]):
+        """Queue a notification for delivery, dropping the oldest queued one when full"""
+        while True:
+            try:
+                self._outbox.put_nowait(notification)
+                return
+            except queue.Full:
+                try:
+                    dropped = self._outbox.get_nowait()
+                    self._outbox.task_done()
+                    logger.warning(f"Notification queue full - dropped {dropped['type']}")
+                except queue.Empty:
+                    pass
+    
+    def _send_loop(self):
+        """Sender thread: deliver queued notifications to the external services"""
+        while True:
+            notification = self._outbox.get()
+            try:
+                if self.email_enabled:
+                    self._send_email(notification)
+                
+                if self.slack_enabled and self.slack_webhook:
+                    self._send_slack(notification)
+            except Exception as e:
+                # One failed delivery must not stop the thread that sends all the others
+                logger.error(f"Failed to deliver {notification.get('type', 'unknown')} notification: {e}")
+            finally:
+                self._outbox.task_done()
+    
+    def flush(self, timeout: float = 10.0):
+        """Wait (up to timeout seconds) for queued notifications to be delivered"""
+        deadline = time.monotonic() + timeout
+        while self._outbox.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
     
     def _send_email(self, notification: Dict[str, Any]):
         """Send email notification"""
@@ -147,9 +278,7 @@ class NotificationManager:
         """Send Slack notification"""
         # In production, send to Slack webhook
         try:
-            import requests
-            
-            if not self.slack_webhook:
+            if not self.slack_webhook or self._session is None:
                 return
             
             slack_message = {
@@ -158,7 +287,7 @@ class NotificationManager:
                 'icon_emoji': ':robot_face:'
             }
             
-            response = requests.post(self.slack_webhook, json=slack_message, timeout=5)
+            response = self._session.post(self.slack_webhook, json=slack_message, timeout=5)
             
             if response.status_code == 200:
                 logger.info(f"💬 Slack notification sent: {notification['type']}")
@@ -170,37 +299,31 @@ class NotificationManager:
     
     def get_notification_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent notification history"""
-        return self.notification_history[-limit:]
+        with self._history_lock:
+            return list(islice(self.notification_history, max(len(self.notification_history) - limit, 0), None))
     
     def get_notification_stats(self) -> Dict[str, Any]:
         """Get notification statistics"""
-        if not self.notification_history:
+        with self._history_lock:
             return {
-                'total_notifications': 0,
-                'by_type': {},
-                'by_severity': {}
+                'total_notifications': len(self.notification_history),
+                'by_type': dict(self._by_type),
+                'by_severity': dict(self._by_severity)
             }
-        
-        # Count by type
-        by_type = {}
-        by_severity = {}
-        
-        for notif in self.notification_history:
-            notif_type = notif.get('type', 'unknown')
-            severity = notif.get('severity', 'unknown')
-            
-            by_type[notif_type] = by_type.get(notif_type, 0) + 1
-            by_severity[severity] = by_severity.get(severity, 0) + 1
-        
-        return {
-            'total_notifications': len(self.notification_history),
-            'by_type': by_type,
-            'by_severity': by_severity
-        }
+    
+    @staticmethod
+    def _uncount(counts: Counter, key: str):
+        """Decrement a count, dropping the key when it reaches zero"""
+        counts[key] -= 1
+        if counts[key] <= 0:
+            del counts[key]
 
-# Global notification manager
-notification_manager = NotificationManager()
+# Global notification manager, created on first use rather than at import
+_notification_manager = None
 
 def get_notification_manager() -> NotificationManager:
     """Get the global notification manager"""
-    return notification_manager
\ No newline at end of file
+    global _notification_manager
+    if _notification_manager is None:
+        _notification_manager = NotificationManager()
+    return _notification_manager
\ No newline at end of file
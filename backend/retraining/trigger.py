@@ -2,34 +2,110 @@
 Automated Model Retraining Trigger System
 Monitors performance and triggers retraining when needed
 """
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from itertools import islice
+from typing import Dict, Any, Iterator, Optional, Tuple
 import logging
+import operator
 import os
+import subprocess
+import sys
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
+# One JSON object per line, appended as jobs are triggered
+RETRAINING_JOBS_FILE = '/tmp/retraining_jobs.jsonl'
+
+
+def _success_rate(metrics: Dict[str, Any], drift_info: Dict[str, Any]) -> float:
+    return metrics.get('success_rate_percent', 100) / 100
+
+
+def _drift_score(metrics: Dict[str, Any], drift_info: Dict[str, Any]) -> Optional[float]:
+    # Only counts when the detector itself flagged drift
+    return drift_info.get('drift_score', 0) if drift_info.get('drift_detected') else None
+
+
+def _error_rate(metrics: Dict[str, Any], drift_info: Dict[str, Any]) -> Optional[float]:
+    # Only judged once the collector has seen enough calls for the rate to mean something
+    return metrics.get('error_rate_percent', 0) / 100 if metrics.get('has_enough_samples') else None
+
+
+def _avg_response_time(metrics: Dict[str, Any], drift_info: Dict[str, Any]) -> float:
+    return metrics.get('avg_response_time_seconds', 0)
+
+
 class RetrainingTrigger:
     """Manages automated model retraining triggers"""
     
     def __init__(self):
         self.performance_threshold = 0.85  # Success rate threshold
         self.drift_threshold = 0.3  # Drift score threshold
-        self.min_samples_for_evaluation = 100
         
-        self.retraining_history = []
-        self.last_retraining = None
+        self.retraining_history = deque(maxlen=100)  # Keep only last 100 events
+        self.last_retraining = None  # Wall-clock time, for get_retraining_status
+        self._last_retraining_ts = None  # time.monotonic() at the same moment, for the interval gate
         self.min_retraining_interval_hours = 24  # Minimum time between retrainings
+        self.max_error_rate = 0.15
+        self.max_avg_response_time = 5.0  # Seconds
+        
+        # Retraining script location, resolved and checked once
+        self._script_path = os.path.normpath(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts', 'retrain_model.py'))
+        self._script_exists = os.path.isfile(self._script_path)
+        
+        # Threshold checks, built once and run in this order (the order reasons are
+        # reported in): (name, value from (metrics, drift_info) or None to skip,
+        # comparison, threshold, reason format)
+        self._checks = (
+            ('success_rate', _success_rate, operator.lt, self.performance_threshold,
+             'Performance below threshold: {value:.2%} < {threshold:.2%}'),
+            ('drift_score', _drift_score, operator.gt, self.drift_threshold,
+             'Significant data drift detected: {value:.3f}'),
+            ('error_rate', _error_rate, operator.gt, self.max_error_rate,
+             'High error rate: {value:.2%}'),
+            ('avg_response_time', _avg_response_time, operator.gt, self.max_avg_response_time,
+             'Response time degraded: {value:.2f}s'),
+        )
+        
+        # Same checks, cheapest first, for should_retrain_fast
+        cost_order = ('drift_score', 'success_rate', 'avg_response_time', 'error_rate')
+        self._fast_checks = tuple(sorted(self._checks, key=lambda check: cost_order.index(check[0])))
+    
+    def should_retrain_fast(self, metrics: Dict[str, Any],
+                            drift_info: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """
+        Cheap yes/no version of evaluate_retraining_need for the polling path
+        
+        Runs the same checks cheapest-first and stops at the first one that fires,
+        without building the result dict or recording an event.
+        
+        Returns:
+            (should_retrain, name of the first check that fired or None)
+        """
+        if (self._last_retraining_ts is not None and
+                time.monotonic() - self._last_retraining_ts < self.min_retraining_interval_hours * 3600):
+            return False, None
+        
+        for name, extract, compare, threshold, _ in self._fast_checks:
+            value = extract(metrics, drift_info)
+            if value is not None and compare(value, threshold):
+                return True, name
+        
+        return False, None
     
     def evaluate_retraining_need(self, metrics: Dict[str, Any], 
-                                 drift_info: Dict[str, Any]) -> Dict[str, Any]:
+                                 drift_info: Dict[str, Any], verbose: bool = False) -> Dict[str, Any]:
         """
         Evaluate if retraining should be triggered
         
         Args:
             metrics: Current performance metrics
             drift_info: Data drift detection results
+            verbose: Include timestamp and metrics_evaluated even when no check fired
         
         Returns:
             Dictionary with retraining decision and reasoning
@@ -38,53 +114,36 @@ class RetrainingTrigger:
         reasons = []
         
         # Check if enough time has passed since last retraining
-        if self.last_retraining:
-            time_since_last = datetime.now() - self.last_retraining
-            if time_since_last.total_seconds() / 3600 < self.min_retraining_interval_hours:
+        if self._last_retraining_ts is not None:
+            seconds_since_last = time.monotonic() - self._last_retraining_ts
+            if seconds_since_last < self.min_retraining_interval_hours * 3600:
                 return {
                     'should_retrain': False,
                     'reasons': ['Too soon since last retraining'],
-                    'time_since_last_hours': time_since_last.total_seconds() / 3600
+                    'time_since_last_hours': seconds_since_last / 3600
                 }
         
-        # Check 1: Performance degradation
-        success_rate = metrics.get('success_rate_percent', 100) / 100
-        if success_rate < self.performance_threshold:
-            should_retrain = True
-            reasons.append(f'Performance below threshold: {success_rate:.2%} < {self.performance_threshold:.2%}')
-        
-        # Check 2: Data drift detected
-        if drift_info.get('drift_detected'):
-            drift_score = drift_info.get('drift_score', 0)
-            if drift_score > self.drift_threshold:
-                should_retrain = True
-                reasons.append(f'Significant data drift detected: {drift_score:.3f}')
-        
-        # Check 3: High error rate
-        total_calls = metrics.get('total_api_calls', 0)
-        failed_responses = metrics.get('failed_responses', 0)
-        
-        if total_calls >= self.min_samples_for_evaluation:
-            error_rate = failed_responses / total_calls
-            if error_rate > 0.15:  # More than 15% error rate
+        # Performance, drift, error rate and response time checks
+        for _, extract, compare, threshold, reason in self._checks:
+            value = extract(metrics, drift_info)
+            if value is not None and compare(value, threshold):
                 should_retrain = True
-                reasons.append(f'High error rate: {error_rate:.2%}')
+                reasons.append(reason.format(value=value, threshold=threshold))
         
-        # Check 4: Response time degradation
-        avg_response_time = metrics.get('avg_response_time_seconds', 0)
-        if avg_response_time > 5.0:  # More than 5 seconds average
-            should_retrain = True
-            reasons.append(f'Response time degraded: {avg_response_time:.2f}s')
+        # Nothing fired: skip the timestamp and metrics_evaluated unless asked for them
+        if not should_retrain and not verbose:
+            return {'should_retrain': False, 'reasons': reasons}
         
+        get_metric = metrics.get
         result = {
             'should_retrain': should_retrain,
             'reasons': reasons,
             'timestamp': datetime.now().isoformat(),
             'metrics_evaluated': {
-                'success_rate': success_rate,
+                'success_rate': get_metric('success_rate_percent', 100) / 100,
                 'drift_score': drift_info.get('drift_score', 0),
-                'error_rate': failed_responses / total_calls if total_calls > 0 else 0,
-                'avg_response_time': avg_response_time
+                'error_rate': get_metric('error_rate_percent', 0) / 100,
+                'avg_response_time': get_metric('avg_response_time_seconds', 0)
             }
         }
         
@@ -108,11 +167,12 @@ class RetrainingTrigger:
         logger.info(f"📋 Reason: {reason}")
 
         try:
-            import subprocess
-
+            # One timestamp for the job id, triggered_at and last_retraining
+            now = datetime.now()
+            job_id = f"retrain_{now:%Y%m%d_%H%M%S}"
             retraining_job = {
-                'job_id': f"retrain_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                'triggered_at': datetime.now().isoformat(),
+                'job_id': job_id,
+                'triggered_at': now.isoformat(),
                 'reason': reason,
                 'status': 'initiated',
                 'steps': [
@@ -121,36 +181,42 @@ class RetrainingTrigger:
                     'training',
                     'validation',
                     'deployment'
-                ]
+                ],
+                'log_path': f"/tmp/{job_id}.log"
             }
 
             # Save retraining job
             self._save_retraining_job(retraining_job)
 
-            logger.info(f"✅ Retraining job created: {retraining_job['job_id']}")
+            logger.info(f"✅ Retraining job created: {job_id}")
 
             # Execute retraining script
-            script_path = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'retrain_model.py')
+            script_path = self._script_path
 
-            if os.path.exists(script_path):
+            if self._script_exists:
                 logger.info(f"🔄 Executing retraining script: {script_path}")
 
-                # Run retraining script in background
-                process = subprocess.Popen(
-                    ['python', script_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
+                # Run retraining script in background, with this interpreter (same venv),
+                # in its own session so it outlives a restart of the API process.
+                # Output goes to the job's log file rather than a pipe nobody reads
+                with open(retraining_job['log_path'], 'a', encoding='utf-8') as log_file:
+                    process = subprocess.Popen(
+                        [sys.executable, '-u', script_path],
+                        stdout=log_file,
+                        stderr=subprocess.STDOUT,
+                        close_fds=True,
+                        start_new_session=True
+                    )
 
                 logger.info(f"✅ Retraining pipeline started in background (PID: {process.pid})")
-                logger.info(f"   Monitor logs for progress")
+                logger.info(f"   Logs: {retraining_job['log_path']}")
             else:
                 logger.warning(f"⚠️ Retraining script not found at: {script_path}")
                 logger.info(f"   Job recorded but not executed")
 
             # Update last retraining timestamp
-            self.last_retraining = datetime.now()
+            self.last_retraining = now
+            self._last_retraining_ts = time.monotonic()
 
             return True
 
@@ -161,41 +227,50 @@ class RetrainingTrigger:
     def _record_retraining_event(self, event: Dict[str, Any]):
         """Record retraining event"""
         self.retraining_history.append(event)
-        
-        # Keep only last 100 events
-        if len(self.retraining_history) > 100:
-            self.retraining_history = self.retraining_history[-100:]
     
     def _save_retraining_job(self, job: Dict[str, Any]):
         """Save retraining job details"""
         # In production, save to database
-        # For demo, save to file
-        jobs_file = '/tmp/retraining_jobs.json'
-        
+        # For demo, append to a JSON Lines file (no re-reading or rewriting of earlier jobs)
         try:
-            # Load existing jobs
-            if os.path.exists(jobs_file):
-                with open(jobs_file, 'r') as f:
-                    jobs = json.load(f)
-            else:
-                jobs = []
-            
-            # Add new job
-            jobs.append(job)
-            
-            # Save
-            with open(jobs_file, 'w') as f:
-                json.dump(jobs, f, indent=2)
+            with open(RETRAINING_JOBS_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(job, separators=(',', ':')) + '\n')
                 
         except Exception as e:
             logger.error(f"Failed to save retraining job: {e}")
     
+    def _load_retraining_jobs(self) -> Iterator[Dict[str, Any]]:
+        """Stream saved retraining jobs, oldest first, one line at a time"""
+        if not os.path.exists(RETRAINING_JOBS_FILE):
+            return
+        
+        with open(RETRAINING_JOBS_FILE, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # e.g. a line cut short by a crash mid-write
+                    logger.warning("Skipping unreadable line in retraining jobs file")
+    
     def get_retraining_status(self) -> Dict[str, Any]:
         """Get current retraining status"""
+        history = self.retraining_history
+        
+        # Saved jobs are streamed from the JSON Lines file, keeping only the last 5
+        recent_jobs = deque(maxlen=5)
+        total_jobs = 0
+        for job in self._load_retraining_jobs():
+            recent_jobs.append(job)
+            total_jobs += 1
+        
         return {
             'last_retraining': self.last_retraining.isoformat() if self.last_retraining else None,
-            'total_retraining_events': len(self.retraining_history),
-            'recent_events': self.retraining_history[-5:],  # Last 5 events
+            'total_retraining_events': len(history),
+            'recent_events': list(islice(history, max(len(history) - 5, 0), None)),  # Last 5 events
+            'total_retraining_jobs': total_jobs,
+            'recent_jobs': list(recent_jobs),  # Last 5 saved jobs
             'thresholds': {
                 'performance_threshold': self.performance_threshold,
                 'drift_threshold': self.drift_threshold,
@@ -203,9 +278,12 @@ class RetrainingTrigger:
             }
         }
 
-# Global retraining trigger
-retraining_trigger = RetrainingTrigger()
+# Global retraining trigger, created on first use rather than at import
+_retraining_trigger = None
 
 def get_retraining_trigger() -> RetrainingTrigger:
     """Get the global retraining trigger"""
-    return retraining_trigger
\ No newline at end of file
+    global _retraining_trigger
+    if _retraining_trigger is None:
+        _retraining_trigger = RetrainingTrigger()
+    return _retraining_trigger
\ No newline at end of file
@@ -2,33 +2,107 @@
 Automated Model Retraining Pipeline
 Triggered when performance degrades or data drift detected
 """
+import argparse
 import os
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.rag_pipeline import PropBotRAG
-from monitoring.metrics import get_metrics_collector
-from monitoring.drift_detector import get_drift_detector
-from notifications.alerts import get_notification_manager
+# chromadb is only needed to check the vector store in pull_latest_data
+try:
+    from chromadb import PersistentClient
+except ImportError:
+    PersistentClient = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _failure_kind(error):
+    """Classify a validation query failure as 'timeout', 'api' or 'other'"""
+    # openai is already loaded (by PropBotRAG) whenever a query has run
+    openai = sys.modules.get('openai')
+
+    if isinstance(error, TimeoutError) or (openai and isinstance(error, openai.APITimeoutError)):
+        return 'timeout'
+    if openai and isinstance(error, openai.APIError):
+        return 'api'
+    return 'other'
+
 class ModelRetrainingPipeline:
     """Automated model retraining pipeline"""
 
-    def __init__(self):
+    def __init__(self, inline_alerts: bool = False, dry_run: bool = False):
+        self.retraining_job_id = f"retrain_{datetime.now():%Y%m%d_%H%M%S}"
+        logger.info(f"🚀 Initializing retraining job: {self.retraining_job_id}")
+
+        # Backend modules are imported here and in _rag_pipeline rather than at
+        # module top, so the job logs its first line before loading them
+        from monitoring.metrics import get_metrics_collector
+        from monitoring.drift_detector import get_drift_detector
+
         self.metrics_collector = get_metrics_collector()
         self.drift_detector = get_drift_detector()
-        self.notification_manager = get_notification_manager()
 
-        self.retraining_job_id = f"retrain_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        logger.info(f"🚀 Initializing retraining job: {self.retraining_job_id}")
+        # A dry run stops before deployment and sends no notifications,
+        # so the notification system is never loaded
+        self.dry_run = dry_run
+        self.notification_manager = None
+        if not dry_run:
+            from notifications.alerts import get_notification_manager
+            self.notification_manager = get_notification_manager()
+
+        # RAG pipeline built by retrain_model and reused by validate_new_model
+        self._rag = None
+
+        # Notifications raised during the run, sent together when it ends;
+        # inline_alerts sends each one as it happens instead
+        self.inline_alerts = inline_alerts
+        self._events = []
+
+    def _rag_pipeline(self):
+        """RAG pipeline for this job, loaded on first use"""
+        if self._rag is None:
+            from src.rag_pipeline import PropBotRAG
+            self._rag = PropBotRAG()
+        return self._rag
+
+    def _notify(self, notification_type, data):
+        """Queue a notification for the end of the run (or send it now with inline_alerts)"""
+        if self.notification_manager is None:
+            return
+
+        if self.inline_alerts:
+            self.notification_manager.send_batch([(notification_type, data)])
+        else:
+            self._events.append((notification_type, data))
+
+    def _flush_notifications(self):
+        """Send the queued notifications as one batch"""
+        if self._events:
+            events, self._events = self._events, []
+            self.notification_manager.send_batch(events)
+
+    @staticmethod
+    def _safe_chat(rag, query, conversation_id):
+        """Run one validation query, returning (result, None) or (result or None, failure kind)"""
+        try:
+            result = rag.chat(query, conversation_id=conversation_id)
+        except Exception as e:
+            logger.warning(f"Validation query failed ({query!r}): {e}")
+            return None, _failure_kind(e)
+
+        # Anything but a dict with a non-empty answer counts as a failed query
+        if not isinstance(result, dict) or not result.get('answer'):
+            logger.warning(f"Validation query returned no answer ({query!r})")
+            return result, 'empty'
+
+        return result, None
 
     def pull_latest_data(self):
         """Pull latest data from sources"""
@@ -41,7 +115,10 @@ class ModelRetrainingPipeline:
             # 3. Query latest from database
 
             # For now, verify ChromaDB is accessible
-            from chromadb import PersistentClient
+            if PersistentClient is None:
+                logger.error("❌ Failed to pull latest data: chromadb is not installed")
+                return False
+
             chroma_path = os.getenv('CHROMA_PATH', '/app/chroma_data')
             client = PersistentClient(path=chroma_path)
             collections = client.list_collections()
@@ -71,7 +148,7 @@ class ModelRetrainingPipeline:
             # - Updating system prompts based on performance
 
             # Simulate retraining process
-            rag = PropBotRAG()
+            rag = self._rag_pipeline()
             logger.info(f"✅ RAG pipeline reinitialized with latest data")
             logger.info(f"   Collections: {len(rag.collection_names)}")
 
@@ -98,19 +175,25 @@ class ModelRetrainingPipeline:
                 "Find 3 bedroom homes under 700k"
             ]
 
-            rag = PropBotRAG()
-            successful = 0
+            rag = self._rag_pipeline()
+
+            # chat() is I/O-bound (retrieval + OpenAI), so the queries run concurrently;
+            # each gets its own conversation so they don't share history
+            conversation_ids = [f"validation_test_{i}" for i in range(len(test_queries))]
+            with ThreadPoolExecutor(max_workers=len(test_queries)) as executor:
+                outcomes = list(executor.map(partial(self._safe_chat, rag), test_queries, conversation_ids))
 
-            for query in test_queries:
-                try:
-                    result = rag.chat(query, conversation_id="validation_test")
-                    if result.get('answer'):
-                        successful += 1
-                except:
-                    pass
+            successful = 0
+            failures = {'timeout': 0, 'api': 0, 'empty': 0, 'other': 0}
+            for _, failure in outcomes:
+                if failure:
+                    failures[failure] += 1
+                else:
+                    successful += 1
 
             validation_score = (successful / len(test_queries)) * 100
             logger.info(f"✅ Validation complete: {validation_score:.1f}% success rate")
+            logger.info(f"   Validation failures: {failures}")
 
             # Pass if > 80% success rate
             return validation_score > 80
@@ -183,12 +266,19 @@ class ModelRetrainingPipeline:
 
     def run_full_pipeline(self):
         """Execute the complete retraining pipeline"""
+        try:
+            return self._run_steps()
+        finally:
+            self._flush_notifications()
+
+    def _run_steps(self):
+        """Run the pipeline steps in order, stopping at the first failure"""
         logger.info("="*60)
         logger.info(f"🔄 STARTING RETRAINING PIPELINE: {self.retraining_job_id}")
         logger.info("="*60)
 
         # Send notification that retraining started
-        self.notification_manager.send_retraining_alert({
+        self._notify('retraining_alert', {
             'job_id': self.retraining_job_id,
             'timestamp': datetime.now().isoformat(),
             'reasons': ['Automated retraining triggered']
@@ -213,7 +303,13 @@ class ModelRetrainingPipeline:
         should_deploy = self.compare_with_baseline()
 
         # Step 5: Deploy if better
-        if should_deploy:
+        if should_deploy and self.dry_run:
+            logger.info("="*60)
+            logger.info("ℹ️ DRY RUN COMPLETED - Skipping deployment")
+            logger.info(f"   New model would be deployed: {self.retraining_job_id}")
+            logger.info("="*60)
+            return True
+        elif should_deploy:
             if self.deploy_new_model():
                 logger.info("="*60)
                 logger.info("✅ RETRAINING PIPELINE COMPLETED SUCCESSFULLY")
@@ -221,7 +317,7 @@ class ModelRetrainingPipeline:
                 logger.info("="*60)
 
                 # Send success notification
-                self.notification_manager.send_deployment_success({
+                self._notify('deployment_success', {
                     'job_id': self.retraining_job_id,
                     'version': 'retrained_model',
                     'timestamp': datetime.now().isoformat()
@@ -241,7 +337,12 @@ class ModelRetrainingPipeline:
 
 def main():
     """Main entry point for retraining pipeline"""
-    pipeline = ModelRetrainingPipeline()
+    parser = argparse.ArgumentParser(description='Automated model retraining pipeline')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='run every step up to deployment, without deploying or sending notifications')
+    args = parser.parse_args()
+
+    pipeline = ModelRetrainingPipeline(dry_run=args.dry_run)
     success = pipeline.run_full_pipeline()
 
     sys.exit(0 if success else 1)
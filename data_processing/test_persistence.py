@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import chromadb
 
 # Connect to ChromaDB
@@ -7,6 +9,13 @@ client = chromadb.HttpClient(host="localhost", port="8000")
 collections = client.list_collections()
 
 print(f"\n📚 Found {len(collections)} collections:")
-for col in collections:
-    count = col.count()
-    print(f"   - {col.name}: {count} documents")
\ No newline at end of file
+
+# Each count() is a round-trip to the server, so fetch them concurrently
+def collection_count(col):
+    return col.name, col.count()
+
+with ThreadPoolExecutor(max_workers=max(1, min(16, len(collections)))) as executor:
+    counts = list(executor.map(collection_count, collections))
+
+for name, count in counts:
+    print(f"   - {name}: {count} documents")
\ No newline at end of file
@@ -2,6 +2,7 @@ import streamlit as st
 import streamlit.components.v1 as components
 from pathlib import Path
 import os
+import re
 
 st.set_page_config(
     page_title="PropBot - Real Estate AI",
@@ -13,22 +14,36 @@ st.set_page_config(
 # Get backend API URL from environment or use default
 backend_url = os.environ.get('BACKEND_API_URL', 'http://127.0.0.1:8080')
 
-# Read files
-def read_file(filepath):
+# Read files once per Streamlit server instead of on every rerun;
+# the modification time is part of the cache key so edited files are picked up
+@st.cache_data
+def _read_cached(filepath, mtime):
     with open(filepath, 'r', encoding='utf-8') as f:
         return f.read()
 
-# Load HTML, CSS, and JS
-html_content = read_file('templates/index.html')
-css_content = read_file('static/css/styles.css')
-js_content = read_file('static/js/main.js')
-
-# Inject backend URL into JavaScript
-js_with_config = f"window.BACKEND_API_URL = '{backend_url}';\n{js_content}"
-
-# Inject CSS and JS into HTML
-full_html = html_content.replace('<!-- CSS_PLACEHOLDER -->', f'<style>{css_content}</style>')
-full_html = full_html.replace('<!-- JS_PLACEHOLDER -->', f'<script>{js_with_config}</script>')
+def read_file(filepath):
+    return _read_cached(filepath, os.path.getmtime(filepath))
+
+ASSET_PATHS = ('templates/index.html', 'static/css/styles.css', 'static/js/main.js')
+PLACEHOLDER = re.compile(r'<!-- (CSS|JS)_PLACEHOLDER -->')
+
+@st.cache_data
+def render_page(backend_url, asset_mtimes):
+    """Full page HTML, built once per backend URL and asset version"""
+    # Load HTML, CSS, and JS
+    html_content, css_content, js_content = (read_file(path) for path in ASSET_PATHS)
+    
+    # Inject backend URL into JavaScript
+    js_with_config = f"window.BACKEND_API_URL = '{backend_url}';\n{js_content}"
+    
+    # Inject CSS and JS into HTML in a single pass
+    injected = {
+        'CSS': f'<style>{css_content}</style>',
+        'JS': f'<script>{js_with_config}</script>'
+    }
+    return PLACEHOLDER.sub(lambda match: injected[match.group(1)], html_content)
+
+full_html = render_page(backend_url, tuple(os.path.getmtime(path) for path in ASSET_PATHS))
 
 # Render
 components.html(full_html, height=900, scrolling=False, width=None)